@@ -1,3 +1,5 @@
+import { getDoorIntervalIndex } from './doorIntervals';
+
 /**
  * Berechnet die aktuelle Öffnungsdauer in Minuten.
  * @param {Object} history - Sensorverlauf mit timestamps und Abstandswerten
@@ -7,31 +9,7 @@
 export const calculateOpenDuration = (history, parameters = {}) => {
   if (!history || history.length < 2) return 0;
   
-  const { targetDistance = 0, tolerance = 5 } = parameters;
-  const now = new Date();
-  let lastClosedTime = now;
-  let isCurrentlyOpen = false;
-
-  // Prüfe ob aktuell offen
-  const currentDistance = history[0].data.distance;
-  isCurrentlyOpen = currentDistance > (targetDistance + tolerance);
-
-  if (!isCurrentlyOpen) return 0;
-
-  // Finde den letzten Zeitpunkt, an dem die Tür geschlossen war
-  for (let i = 0; i < history.length; i++) {
-    const entry = history[i];
-    const distance = entry.data.distance;
-    
-    if (distance <= (targetDistance + tolerance)) {
-      lastClosedTime = new Date(entry.timestamp);
-      break;
-    }
-  }
-
-  // Berechne die Differenz in Minuten
-  const diffInMs = now - lastClosedTime;
-  return Math.floor(diffInMs / (1000 * 60));
+  return getDoorIntervalIndex(history, parameters).currentOpenDuration();
 };
 
 /**
@@ -44,10 +22,6 @@ export const calculateOpenDuration = (history, parameters = {}) => {
 export const calculateOpenCount = (history, parameters = {}, timeframe = 'today') => {
   if (!history || history.length < 2) return 0;
   
-  const { targetDistance = 0, tolerance = 5 } = parameters;
-  let count = 0;
-  let wasOpen = false;
-  
   // Startzeit basierend auf timeframe
   const now = new Date();
   let startTime;
@@ -63,25 +37,11 @@ export const calculateOpenCount = (history, parameters = {}, timeframe = 'today'
       startTime = new Date(now.setHours(0, 0, 0, 0));
   }
 
-  // Filtere relevante Historie
-  const relevantHistory = history.filter(entry => 
-    new Date(entry.timestamp) >= startTime
-  );
-
-  // Zähle Übergänge von geschlossen zu offen
-  for (let i = 0; i < relevantHistory.length; i++) {
-    const distance = relevantHistory[i].data.distance;
-    const isOpen = distance > (targetDistance + tolerance);
-    
-    if (isOpen && !wasOpen) {
-      // Übergang von geschlossen zu offen
-      count++;
-    }
-    
-    wasOpen = isOpen;
-  }
-
-  return count;
+  // Öffnungen seit Startzeit per Binärsuche über die Ereignisliste; eine zu Beginn des
+  // Zeitraums bereits laufende Öffnung zählt wie bisher mit
+  const index = getDoorIntervalIndex(history, parameters);
+  const from = startTime.getTime();
+  return index.countOpenings(from) + (index.openingAt(from) ? 1 : 0);
 };
 
 /**
@@ -99,34 +59,8 @@ export const calculateOpeningStats = (history, parameters = {}) => {
   const avgDailyOpenings = Math.round(weeklyCount / 7);
   
   // Durchschnittliche Öffnungsdauer
-  let totalDuration = 0;
-  let openingCount = 0;
-  let currentDuration = 0;
-  
-  const { targetDistance = 0, tolerance = 5 } = parameters;
-  let wasOpen = false;
-  let openingStart = null;
-  
-  for (let i = history.length - 1; i >= 0; i--) {
-    const entry = history[i];
-    const isOpen = entry.data.distance > (targetDistance + tolerance);
-    
-    if (isOpen && !wasOpen) {
-      // Öffnung beginnt
-      openingStart = new Date(entry.timestamp);
-    } else if (!isOpen && wasOpen && openingStart) {
-      // Öffnung endet
-      const endTime = new Date(entry.timestamp);
-      currentDuration = (endTime - openingStart) / (1000 * 60); // in Minuten
-      totalDuration += currentDuration;
-      openingCount++;
-      openingStart = null;
-    }
-    
-    wasOpen = isOpen;
-  }
-  
-  const avgDuration = openingCount > 0 ? Math.round(totalDuration / openingCount) : 0;
+  const index = getDoorIntervalIndex(history, parameters);
+  const avgDuration = Math.round(index.averageDuration());
 
   return {
     today: dailyCount,
@@ -0,0 +1,263 @@
+import json
+import os
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sensor_history import (
+    load_sensor_data, parse_timestamp, sorted_history, sensor_kind, calculate_fill_level, history_rewritten
+)
+
+# Zustand des Aggregat-Würfels
+CUBE_STATE_PATH = os.path.join('src', 'data', 'aggregateCube.json')
+# Auflösungen der Zeitbuckets
+RESOLUTIONS = ('hour', 'day')
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    if resolution == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def derived_metrics(sensor: Dict, values: Dict) -> Dict[str, float]:
+    """Messgrößen eines Eintrags inkl. der in den Ansichten abgeleiteten Werte (Leistung, Füllstand)."""
+    metrics = {key: float(value) for key, value in values.items()
+               if isinstance(value, (int, float)) and not isinstance(value, bool)}
+    kind = sensor_kind(sensor)
+    if kind == 'energy' and 'voltage' in metrics and 'current' in metrics:
+        metrics['power'] = metrics['voltage'] * metrics['current']
+    elif kind == 'fill' and 'distance' in metrics:
+        level = calculate_fill_level(metrics['distance'], sensor.get('parameters') or {})
+        if level is not None:
+            metrics['fillLevel'] = level
+    return metrics
+
+class AggregateCube:
+    """
+    Vorberechnete Aggregate (count/sum/min/max) je Raum, Kategorie, Asset,
+    Messgröße und Zeitbucket (Stunde und Tag). Neue Messwerte werden beim
+    Anhängen direkt eingerechnet, Abfragen lesen nur die passenden Zellen.
+    """
+
+    def __init__(self):
+        # (room, category, asset, metric, resolution) -> {bucket_iso: [count, sum, min, max]}
+        self.cells = {}
+        # (room, category, asset, metric, resolution) -> sortierte Liste der Bucket-Zeitstempel
+        self.buckets = {}
+        # sensor_id -> letzter eingerechneter Zeitstempel
+        self.last_timestamps = {}
+        # sensor_id -> erster eingerechneter Zeitstempel
+        self.first_timestamps = {}
+        # sensor_id -> [room, category, asset] der eingerechneten Zellen
+        self.sensor_groups = {}
+
+    def _add(self, group: Tuple, bucket: str, value: float) -> None:
+        group_cells = self.cells.setdefault(group, {})
+        cell = group_cells.get(bucket)
+        if cell is None:
+            group_cells[bucket] = [1, value, value, value]
+            insort(self.buckets.setdefault(group, []), bucket)
+        else:
+            cell[0] += 1
+            cell[1] += value
+            cell[2] = min(cell[2], value)
+            cell[3] = max(cell[3], value)
+
+    def append(self, sensor: Dict, entry: Dict, category_id: Optional[str] = None) -> bool:
+        """Rechnet einen neuen History-Eintrag ein. Bereits enthaltene Einträge werden übersprungen."""
+        sensor_id = str(sensor['id'])
+        last = self.last_timestamps.get(sensor_id)
+        timestamp = parse_timestamp(entry['timestamp'])
+        if last is not None and timestamp <= parse_timestamp(last):
+            return False
+
+        room_id = sensor.get('roomId')
+        asset_id = sensor.get('assetId')
+        for metric, value in derived_metrics(sensor, entry.get('data', {})).items():
+            for resolution in RESOLUTIONS:
+                bucket = bucket_start(timestamp, resolution).isoformat()
+                self._add((room_id, category_id, asset_id, metric, resolution), bucket, value)
+
+        self.last_timestamps[sensor_id] = entry['timestamp']
+        self.first_timestamps.setdefault(sensor_id, entry['timestamp'])
+        self.sensor_groups[sensor_id] = [room_id, category_id, asset_id]
+        return True
+
+    def _reset_groups(self, prefixes: set) -> None:
+        """
+        Verwirft alle Zellen der angegebenen (room, category, asset)-Gruppen. Min/Max lassen sich
+        nicht herausrechnen, daher werden alle Sensoren dieser Gruppen beim Update neu eingerechnet.
+        """
+        for group in [group for group in self.cells if group[:3] in prefixes]:
+            del self.cells[group]
+            del self.buckets[group]
+        for sensor_id, prefix in list(self.sensor_groups.items()):
+            if tuple(prefix) in prefixes:
+                del self.sensor_groups[sensor_id]
+                self.last_timestamps.pop(sensor_id, None)
+                self.first_timestamps.pop(sensor_id, None)
+
+    def update(self, data: Dict) -> int:
+        """Rechnet alle Einträge ein, die neuer als der zuletzt eingerechnete Stand sind."""
+        asset_categories = {asset['id']: asset.get('categoryId') for asset in data.get('assets', [])}
+        histories = {}
+        rewritten = set()
+        for sensor in data.get('sensors', []):
+            sensor_id = str(sensor['id'])
+            history = sorted_history(sensor)
+            times = [parse_timestamp(entry['timestamp']) for entry in history]
+            last = self.last_timestamps.get(sensor_id)
+            if last is not None:
+                current_group = [sensor.get('roomId'), asset_categories.get(sensor.get('assetId')), sensor.get('assetId')]
+                stored_group = self.sensor_groups.get(sensor_id) or current_group
+                # Nur das Ende der History ist neu
+                booked = bisect_right(times, parse_timestamp(last))
+                if (list(stored_group) != current_group
+                        or history_rewritten(history[:booked], last, self.first_timestamps.get(sensor_id))):
+                    # Sensor verschoben, Zeitstempel verschoben (update_timestamps.py) oder History ersetzt
+                    rewritten.add(tuple(stored_group))
+            histories[sensor_id] = (history, times)
+
+        # Zellen entfernter Sensoren verwerfen
+        for sensor_id in [sensor_id for sensor_id in self.last_timestamps if sensor_id not in histories]:
+            if sensor_id in self.sensor_groups:
+                rewritten.add(tuple(self.sensor_groups[sensor_id]))
+            self.last_timestamps.pop(sensor_id, None)
+            self.first_timestamps.pop(sensor_id, None)
+        if rewritten:
+            self._reset_groups(rewritten)
+
+        added = 0
+        for sensor in data.get('sensors', []):
+            category_id = asset_categories.get(sensor.get('assetId'))
+            history, times = histories[str(sensor['id'])]
+            last = self.last_timestamps.get(str(sensor['id']))
+            if last is not None:
+                history = history[bisect_left(times, parse_timestamp(last)):]
+            for entry in history:
+                if self.append(sensor, entry, category_id):
+                    added += 1
+        return added
+
+    def _matching_groups(self, metric: str, resolution: str, room: Optional[str],
+                         category: Optional[str], asset: Optional[str]) -> List[Tuple]:
+        return [group for group in self.cells
+                if group[3] == metric and group[4] == resolution
+                and (room is None or group[0] == room)
+                and (category is None or group[1] == category)
+                and (asset is None or group[2] == asset)]
+
+    def _collect(self, groups: List[Tuple], start: str, end: str, result: Dict) -> None:
+        for group in groups:
+            buckets = self.buckets[group]
+            for bucket in buckets[bisect_left(buckets, start):bisect_left(buckets, end)]:
+                count, total, minimum, maximum = self.cells[group][bucket]
+                target = result.setdefault(bucket, [0, 0.0, minimum, maximum])
+                target[0] += count
+                target[1] += total
+                target[2] = min(target[2], minimum)
+                target[3] = max(target[3], maximum)
+
+    def series(self, metric: str, start: datetime, end: datetime, resolution: str = 'hour',
+               room: Optional[str] = None, category: Optional[str] = None,
+               asset: Optional[str] = None) -> List[Dict]:
+        """Aggregierte Zeitreihe für einen Raum, eine Kategorie oder ein Asset (z.B. für Diagramme)."""
+        result = {}
+        groups = self._matching_groups(metric, resolution, room, category, asset)
+        self._collect(groups, bucket_start(start, resolution).isoformat(), end.isoformat(), result)
+        return [
+            {'timestamp': bucket, 'count': count, 'mean': total / count, 'min': minimum, 'max': maximum}
+            for bucket, (count, total, minimum, maximum) in sorted(result.items())
+        ]
+
+    def query(self, metric: str, start: datetime, end: datetime, room: Optional[str] = None,
+              category: Optional[str] = None, asset: Optional[str] = None) -> Optional[Dict]:
+        """
+        Gesamtaggregat über einen Zeitraum. Volle Tage werden aus den Tageszellen gelesen,
+        nur die angebrochenen Ränder aus den Stundenzellen (Genauigkeit: volle Stunden).
+        """
+        result = {}
+        first_day = bucket_start(start, 'day')
+        if first_day < start:
+            first_day += timedelta(days=1)
+        last_day = bucket_start(end, 'day')
+
+        hour_groups = self._matching_groups(metric, 'hour', room, category, asset)
+        if first_day < last_day:
+            day_groups = self._matching_groups(metric, 'day', room, category, asset)
+            self._collect(day_groups, first_day.isoformat(), last_day.isoformat(), result)
+            self._collect(hour_groups, bucket_start(start, 'hour').isoformat(), first_day.isoformat(), result)
+            self._collect(hour_groups, last_day.isoformat(), end.isoformat(), result)
+        else:
+            self._collect(hour_groups, bucket_start(start, 'hour').isoformat(), end.isoformat(), result)
+
+        if not result:
+            return None
+        count = sum(cell[0] for cell in result.values())
+        total = sum(cell[1] for cell in result.values())
+        return {
+            'count': count,
+            'mean': total / count,
+            'min': min(cell[2] for cell in result.values()),
+            'max': max(cell[3] for cell in result.values()),
+            'cells': len(result)
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'lastTimestamps': self.last_timestamps,
+            'firstTimestamps': self.first_timestamps,
+            'sensorGroups': self.sensor_groups,
+            'cells': [list(group) + [bucket] + cell
+                      for group, group_cells in self.cells.items()
+                      for bucket, cell in group_cells.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'AggregateCube':
+        cube = cls()
+        cube.last_timestamps = state.get('lastTimestamps', {})
+        cube.first_timestamps = state.get('firstTimestamps', {})
+        cube.sensor_groups = state.get('sensorGroups', {})
+        for row in state.get('cells', []):
+            group = tuple(row[:5])
+            cube.cells.setdefault(group, {})[row[5]] = row[6:]
+            cube.buckets.setdefault(group, []).append(row[5])
+        for buckets in cube.buckets.values():
+            buckets.sort()
+        return cube
+
+def load_cube(file_path: str = CUBE_STATE_PATH) -> AggregateCube:
+    """Lädt den gespeicherten Würfel oder beginnt einen neuen."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return AggregateCube.from_dict(json.load(file))
+    except FileNotFoundError:
+        return AggregateCube()
+
+def save_cube(cube: AggregateCube, file_path: str = CUBE_STATE_PATH) -> None:
+    """Speichert den Würfel."""
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump(cube.to_dict(), file)
+
+def main():
+    data = load_sensor_data()
+    cube = load_cube()
+    added = cube.update(data)
+    save_cube(cube)
+    print(f"{added} neue Messwerte eingerechnet.")
+
+    timestamps = [parse_timestamp(last) for last in cube.last_timestamps.values()]
+    if not timestamps:
+        return
+    end = max(timestamps) + timedelta(seconds=1)
+    start = end - timedelta(days=7)
+
+    print("\nTemperatur pro Raum (letzte 7 Tage):")
+    for room in data.get('rooms', []):
+        result = cube.query('temperature', start, end, room=room['id'])
+        if result:
+            print(f"{room['name']}: Ø {result['mean']:.1f} °C, min {result['min']:.1f}, "
+                  f"max {result['max']:.1f} ({result['count']} Messwerte aus {result['cells']} Zellen)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Dict, List
+
+from sensor_history import load_sensor_data, sorted_history, parse_timestamp, sensor_kind
+
+# Länge des rollierenden Prüffensters
+ROLLING_WINDOW = timedelta(hours=24)
+# Zulässige Minuten außerhalb der Toleranz pro Fenster, bevor ein Sensor auffällt
+MAX_EXCURSION_MINUTES = 30
+# Längere Messlücken werden nur bis zu dieser Dauer gewertet
+MAX_GAP = timedelta(hours=1)
+# Sensoren mit Zieltemperatur bis hierhin gelten als Kühlkette
+COLD_CHAIN_MAX_TARGET = 10
+
+# Messgröße -> (Zielwert-Parameter, Toleranz-Parameter)
+TOLERANCE_PARAMETERS = {
+    'temperature': ('targetTemperature', 'tempTolerance'),
+    'humidity': ('targetHumidity', 'humidityTolerance')
+}
+
+def sample_intervals(history: List[Dict]) -> List[Dict]:
+    """
+    Ordnet jedem Messwert die Dauer bis zum nächsten Messwert zu (in Minuten, begrenzt auf MAX_GAP).
+    Der letzte Messwert erhält das Intervall des vorletzten.
+    """
+    times = [parse_timestamp(entry['timestamp']) for entry in history]
+    intervals = []
+    for index, entry in enumerate(history):
+        if index + 1 < len(times):
+            duration = times[index + 1] - times[index]
+        elif index > 0:
+            duration = times[index] - times[index - 1]
+        else:
+            duration = timedelta(0)
+        intervals.append({
+            'time': times[index],
+            'minutes': min(duration, MAX_GAP).total_seconds() / 60,
+            'data': entry.get('data', {})
+        })
+    return intervals
+
+def max_rolling_sum(intervals: List[Dict], flags: List[bool], window: timedelta) -> float:
+    """Maximale Summe der markierten Minuten in einem rollierenden Zeitfenster (gleitendes Fenster, O(n))."""
+    best = 0.0
+    current = 0.0
+    active = deque()
+    for interval, flagged in zip(intervals, flags):
+        if flagged:
+            active.append(interval)
+            current += interval['minutes']
+        while active and interval['time'] - active[0]['time'] >= window:
+            current -= active.popleft()['minutes']
+        best = max(best, current)
+    return best
+
+def longest_run(intervals: List[Dict], flags: List[bool]) -> float:
+    """Längste zusammenhängende Überschreitung in Minuten."""
+    longest = 0.0
+    current = 0.0
+    for interval, flagged in zip(intervals, flags):
+        current = current + interval['minutes'] if flagged else 0.0
+        longest = max(longest, current)
+    return longest
+
+def audit_sensor(sensor: Dict, window: timedelta = ROLLING_WINDOW) -> Dict:
+    """Berechnet die Compliance-Kennzahlen eines Klimasensors."""
+    parameters = sensor.get('parameters') or {}
+    intervals = sample_intervals(sorted_history(sensor))
+    report = {
+        'sensorId': sensor['id'],
+        'assetId': sensor.get('assetId'),
+        'roomId': sensor.get('roomId'),
+        'coldChain': parameters.get('targetTemperature', COLD_CHAIN_MAX_TARGET + 1) <= COLD_CHAIN_MAX_TARGET,
+        'observedMinutes': sum(interval['minutes'] for interval in intervals),
+        'metrics': {}
+    }
+
+    for metric, (target_key, tolerance_key) in TOLERANCE_PARAMETERS.items():
+        target = parameters.get(target_key)
+        tolerance = parameters.get(tolerance_key)
+        if target is None or tolerance is None:
+            continue
+        flags = [
+            metric in interval['data'] and abs(interval['data'][metric] - target) > tolerance
+            for interval in intervals
+        ]
+        report['metrics'][metric] = {
+            'minutesOutside': sum(interval['minutes'] for interval, flagged in zip(intervals, flags) if flagged),
+            'longestExcursion': longest_run(intervals, flags),
+            'worstWindow': max_rolling_sum(intervals, flags, window)
+        }
+
+    mold_flags = [bool(interval['data'].get('moldy?')) for interval in intervals]
+    report['moldRiskMinutes'] = sum(interval['minutes'] for interval, flagged in zip(intervals, mold_flags) if flagged)
+    report['moldRiskWorstWindow'] = max_rolling_sum(intervals, mold_flags, window)
+    report['compliant'] = all(
+        metric['worstWindow'] <= MAX_EXCURSION_MINUTES for metric in report['metrics'].values()
+    ) and report['moldRiskWorstWindow'] == 0
+    return report
+
+def audit_fleet(data: Dict, window: timedelta = ROLLING_WINDOW) -> List[Dict]:
+    """Erstellt den Audit-Bericht für alle Klimasensoren, auffällige Sensoren zuerst."""
+    reports = [audit_sensor(sensor, window) for sensor in data.get('sensors', [])
+               if sensor_kind(sensor) == 'climate']
+    reports.sort(key=lambda report: (
+        report['compliant'],
+        -max([metric['worstWindow'] for metric in report['metrics'].values()] or [0])
+    ))
+    return reports
+
+def main():
+    data = load_sensor_data()
+    asset_names = {asset['id']: asset['name'] for asset in data.get('assets', [])}
+
+    started = time.perf_counter()
+    reports = audit_fleet(data)
+    duration = time.perf_counter() - started
+
+    print(f"\nCompliance-Bericht (rollierendes Fenster {ROLLING_WINDOW}, "
+          f"max. {MAX_EXCURSION_MINUTES} Minuten außerhalb der Toleranz):")
+    for report in reports:
+        name = asset_names.get(report['assetId'], f"Sensor {report['sensorId']}")
+        status = "OK" if report['compliant'] else "AUFFÄLLIG"
+        label = " (Kühlkette)" if report['coldChain'] else ""
+        print(f"\n{name}{label}: {status}")
+        for metric, values in report['metrics'].items():
+            print(f"  {metric}: {values['minutesOutside']:.0f} min außerhalb, "
+                  f"längste Abweichung {values['longestExcursion']:.0f} min, "
+                  f"schlechtestes Fenster {values['worstWindow']:.0f} min")
+        print(f"  Schimmelrisiko: {report['moldRiskMinutes']:.0f} min")
+
+    non_compliant = sum(1 for report in reports if not report['compliant'])
+    print(f"\n{non_compliant} von {len(reports)} Klimasensoren auffällig ({duration * 1000:.0f} ms).")
+
+if __name__ == "__main__":
+    main()
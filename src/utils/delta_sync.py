@@ -0,0 +1,283 @@
+import argparse
+import copy
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sensor_history import load_sensor_data, JSON_FILE_PATH
+
+# Ablage für Versionsstand (letzter Snapshot und Delta-Log)
+VERSIONS_DIR = os.path.join('src', 'data', 'versions')
+SNAPSHOT_FILE = 'snapshot.json'
+DELTA_LOG_FILE = 'deltas.jsonl'
+# Ältere Deltas werden verworfen, Clients davor erhalten einen Komplettabgleich
+MAX_DELTAS = 500
+# Das Log wird erst bei dieser Länge bzw. Größe gekürzt, damit nicht jeder Schreibvorgang es neu schreibt
+MAX_LOG_LENGTH = 2 * MAX_DELTAS
+MAX_LOG_BYTES = 20 * 1024 * 1024
+# Deltas über diesem Anteil der Datensatzgröße werden nur als Komplettabgleich protokolliert
+FULL_RESYNC_RATIO = 0.5
+
+ENTITY_TYPES = ("sensors", "rooms", "assets", "categories", "favorites")
+
+def empty_delta() -> Dict:
+    return {entity_type: {"upserted": {}, "appended": {}, "deleted": []} for entity_type in ENTITY_TYPES}
+
+def is_empty_delta(delta: Dict) -> bool:
+    return all(not changes["upserted"] and not changes["appended"] and not changes["deleted"]
+               for changes in delta.values())
+
+def appended_history(old_history: List[Dict], new_history: List[Dict]) -> Optional[List[Dict]]:
+    """
+    Liefert die neu angehängten History-Einträge, wenn die alte History ein Präfix der neuen ist.
+    Bei anderen Änderungen (z.B. neu geschriebene Zeitstempel) wird None geliefert.
+    """
+    if len(new_history) < len(old_history):
+        return None
+    if old_history and (new_history[0] != old_history[0] or new_history[len(old_history) - 1] != old_history[-1]):
+        return None
+    return new_history[len(old_history):]
+
+def compute_delta(old: Dict, new: Dict) -> Dict:
+    """
+    Berechnet ein kompaktes Delta zwischen zwei Snapshots:
+    geänderte Felder bzw. neue Entitäten (upserted), neue History-Einträge (appended)
+    und gelöschte IDs (deleted) pro Entitätstyp.
+    """
+    delta = empty_delta()
+    for entity_type in ENTITY_TYPES:
+        old_items = {str(item["id"]): item for item in old.get(entity_type, [])}
+        new_items = {str(item["id"]): item for item in new.get(entity_type, [])}
+        changes = delta[entity_type]
+
+        changes["deleted"] = [entity_id for entity_id in old_items if entity_id not in new_items]
+
+        for entity_id, item in new_items.items():
+            previous = old_items.get(entity_id)
+            if previous is None:
+                changes["upserted"][entity_id] = item
+                continue
+
+            changed_fields = {}
+            for key, value in item.items():
+                if key == "history" and isinstance(previous.get("history"), list):
+                    appended = appended_history(previous["history"], value)
+                    if appended is None:
+                        changed_fields[key] = value
+                    elif appended:
+                        changes["appended"][entity_id] = appended
+                elif previous.get(key) != value:
+                    changed_fields[key] = value
+            # Entfernte Felder explizit auf None setzen
+            for key in previous:
+                if key not in item:
+                    changed_fields[key] = None
+
+            if changed_fields:
+                changes["upserted"][entity_id] = changed_fields
+    return delta
+
+def merge_deltas(base: Dict, delta: Dict) -> Dict:
+    """Fasst zwei aufeinanderfolgende Deltas zu einem zusammen (base wird verändert)."""
+    for entity_type in ENTITY_TYPES:
+        target = base[entity_type]
+        changes = delta[entity_type]
+
+        for entity_id in changes["deleted"]:
+            target["upserted"].pop(entity_id, None)
+            target["appended"].pop(entity_id, None)
+            if entity_id not in target["deleted"]:
+                target["deleted"].append(entity_id)
+
+        for entity_id, fields in changes["upserted"].items():
+            if entity_id in target["deleted"] and entity_id not in target["upserted"]:
+                # Gelöscht und neu angelegt: ID bleibt gelöscht, damit beim Client keine alten
+                # Felder überleben; das Upsert enthält die komplette neue Entität
+                target["upserted"][entity_id] = dict(fields)
+                continue
+            merged = dict(target["upserted"].get(entity_id, {}))
+            merged.update(fields)
+            target["upserted"][entity_id] = merged
+            if "history" in fields:
+                target["appended"].pop(entity_id, None)
+
+        for entity_id, entries in changes["appended"].items():
+            upserted = target["upserted"].get(entity_id)
+            if upserted is not None and isinstance(upserted.get("history"), list):
+                upserted["history"] = upserted["history"] + entries
+            else:
+                target["appended"][entity_id] = target["appended"].get(entity_id, []) + entries
+    return base
+
+def apply_delta(snapshot: Dict, delta: Dict) -> Dict:
+    """Wendet ein Delta auf einen Snapshot an und liefert den neuen Snapshot."""
+    result = copy.deepcopy(snapshot)
+    for entity_type in ENTITY_TYPES:
+        changes = delta[entity_type]
+        items = result.setdefault(entity_type, [])
+        deleted = set(changes["deleted"])
+        items[:] = [item for item in items if str(item["id"]) not in deleted]
+        index = {str(item["id"]): item for item in items}
+
+        for entity_id, fields in changes["upserted"].items():
+            item = index.get(entity_id)
+            if item is None:
+                item = {key: copy.deepcopy(value) for key, value in fields.items() if value is not None}
+                items.append(item)
+                index[entity_id] = item
+                continue
+            for key, value in fields.items():
+                if value is None:
+                    item.pop(key, None)
+                else:
+                    item[key] = copy.deepcopy(value)
+
+        for entity_id, entries in changes["appended"].items():
+            item = index.get(entity_id)
+            if item is not None:
+                item.setdefault("history", []).extend(copy.deepcopy(entries))
+    return result
+
+class VersionStore:
+    """
+    Vergibt für jeden Schreibvorgang eine fortlaufende Version und speichert
+    das Delta zur Vorversion. Clients fragen "Änderungen seit Version N" ab
+    und übertragen nur, was sich tatsächlich geändert hat.
+
+    Mit data_path ist die Datendatei selbst der Snapshot der aktuellen Version
+    (z.B. hinter SensorWAL), es wird keine zweite Kopie des Datensatzes abgelegt.
+    """
+
+    def __init__(self, directory: str = VERSIONS_DIR, data_path: Optional[str] = None):
+        self.directory = directory
+        self.data_path = data_path
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.log_path = os.path.join(directory, DELTA_LOG_FILE)
+
+    def _read_log(self) -> List[Dict]:
+        try:
+            with open(self.log_path, 'r', encoding='utf-8') as file:
+                return [json.loads(line) for line in file if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _read_snapshot(self) -> Dict:
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"version": 0, "data": {entity_type: [] for entity_type in ENTITY_TYPES}}
+
+    def _current_data(self, snapshot: Dict) -> Dict:
+        if self.data_path is not None:
+            # Nur die Datendatei selbst entspricht der Version, nicht verdichtete Protokolleinträge nicht
+            with open(self.data_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        return snapshot["data"]
+
+    def current_version(self) -> int:
+        return self._read_snapshot()["version"]
+
+    def record(self, data: Dict, previous: Optional[Dict] = None) -> int:
+        """
+        Speichert einen neuen Stand. Ohne Änderungen bleibt die Version gleich.
+        Mit data_path muss der vorherige Stand übergeben werden; ohne ihn (z.B. bei komplett
+        neu geschriebenen Daten) wird nur eine Markierung für den Komplettabgleich protokolliert.
+        """
+        snapshot = self._read_snapshot()
+        if self.data_path is None:
+            previous = snapshot["data"]
+
+        entry = {"version": snapshot["version"] + 1, "timestamp": datetime.now().isoformat()}
+        if previous is None:
+            entry["fullResync"] = True
+        else:
+            delta = compute_delta(previous, data)
+            if is_empty_delta(delta):
+                return snapshot["version"]
+            line = json.dumps(delta, ensure_ascii=False)
+            data_size = (os.path.getsize(self.data_path) if self.data_path is not None
+                         else len(json.dumps(data, ensure_ascii=False)))
+            if len(line) > FULL_RESYNC_RATIO * data_size:
+                # Delta fast so groß wie der Datensatz (z.B. nach update_timestamps.py): Komplettabgleich
+                entry["fullResync"] = True
+            else:
+                entry["delta"] = delta
+
+        version = entry["version"]
+        # Älteste Version im Log steht im Snapshot, so muss das Log zum Anhängen nicht gelesen werden
+        oldest = snapshot.get("oldestVersion")
+        if oldest is None:
+            log = self._read_log()
+            oldest = log[0]["version"] if log else version
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.log_path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        if version - oldest + 1 > MAX_LOG_LENGTH or os.path.getsize(self.log_path) > MAX_LOG_BYTES:
+            oldest = self._trim_log()
+
+        state = {"version": version, "oldestVersion": oldest}
+        if self.data_path is None:
+            state["data"] = data
+        with open(self.snapshot_path, 'w', encoding='utf-8') as file:
+            json.dump(state, file, ensure_ascii=False)
+        return version
+
+    def _trim_log(self) -> int:
+        """
+        Kürzt das Log auf höchstens MAX_DELTAS Einträge und die halbe Maximalgröße, damit es
+        nur selten neu geschrieben wird. Liefert die älteste verbleibende Version.
+        """
+        with open(self.log_path, 'r', encoding='utf-8') as file:
+            lines = [line for line in file if line.strip()]
+        kept = []
+        size = 0
+        for line in reversed(lines[-MAX_DELTAS:]):
+            size += len(line.encode('utf-8'))
+            if kept and size > MAX_LOG_BYTES // 2:
+                break
+            kept.append(line)
+        kept.reverse()
+        with open(self.log_path, 'w', encoding='utf-8') as file:
+            file.writelines(kept)
+        return json.loads(kept[0])["version"]
+
+    def changes_since(self, version: int) -> Dict:
+        """
+        Liefert die Änderungen seit der angegebenen Version als ein zusammengefasstes Delta.
+        Liegt die Version vor dem ältesten gespeicherten Delta oder vor einer Markierung
+        für den Komplettabgleich, wird der komplette Datensatz geliefert.
+        """
+        snapshot = self._read_snapshot()
+        if version >= snapshot["version"]:
+            return {"fromVersion": version, "toVersion": snapshot["version"], "delta": empty_delta()}
+
+        log = [record for record in self._read_log() if record["version"] > version]
+        if not log or log[0]["version"] != version + 1 or any(record.get("fullResync") for record in log):
+            return {"fromVersion": version, "toVersion": snapshot["version"],
+                    "fullResync": True, "data": self._current_data(snapshot)}
+
+        combined = empty_delta()
+        for record in log:
+            merge_deltas(combined, record["delta"])
+        return {"fromVersion": version, "toVersion": snapshot["version"], "delta": combined}
+
+def main():
+    parser = argparse.ArgumentParser(description="Versionierung und Delta-Abgleich für sensorData.json")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("record", help="Aktuellen Stand als neue Version speichern")
+    since_parser = subparsers.add_parser("since", help="Änderungen seit Version N ausgeben")
+    since_parser.add_argument("version", type=int)
+    args = parser.parse_args()
+
+    store = VersionStore()
+    if args.command == "record":
+        version = store.record(load_sensor_data(JSON_FILE_PATH))
+        print(f"Aktuelle Version: {version}")
+    else:
+        print(json.dumps(store.changes_since(args.version), indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from sensor_history import (
+    load_sensor_data, sorted_history, parse_timestamp, calculate_sensor_status, sensor_kind
+)
+
+# Ablage der abgeleiteten Daten
+CACHE_DIR = os.path.join('src', 'data', 'cache')
+INDEX_FILE = 'index.json'
+# Maximale Gesamtgröße, darüber werden die am längsten ungenutzten Einträge verworfen
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+# Beim Verwerfen auf diesen Anteil der Maximalgröße kürzen, damit nicht jeder Eintrag eine Verdrängung auslöst
+EVICT_TARGET = 0.9
+# Bei Änderungen an den Berechnungen erhöhen, damit alte Einträge nicht mehr passen
+CACHE_VERSION = 1
+# Unterscheidet "nicht im Cache" von einem gespeicherten None (z.B. leere History)
+_MISSING = object()
+
+def sensor_content_hash(sensor: Dict) -> str:
+    """Hash über den kompletten Sensorinhalt (Parameter, Daten, History)."""
+    content = json.dumps(sensor, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class DerivedCache:
+    """
+    Persistenter Cache für abgeleitete Daten (Statistiken, Zeitbereiche, Status, Indizes).
+    Schlüssel ist die Art des Artefakts plus Inhalts-Hash des Sensors, sodass nur Sensoren
+    neu berechnet werden, deren History sich geändert hat. Die Größe ist per LRU begrenzt.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                self.index = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+        # Laufende Gesamtgröße, damit put() nicht über den ganzen Index summieren muss
+        self.total_bytes = sum(entry['size'] for entry in self.index.values())
+
+    def _drop(self, key: str) -> None:
+        self.total_bytes -= self.index.pop(key)['size']
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, key: str, default=None):
+        entry = self.index.get(key)
+        if entry is None:
+            return default
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as file:
+                value = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._drop(key)
+            return default
+        entry['lastUsed'] = time.time()
+        return value
+
+    def put(self, key: str, value) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        content = json.dumps(value, ensure_ascii=False)
+        with open(self._path(key), 'w', encoding='utf-8') as file:
+            file.write(content)
+        if key in self.index:
+            self._drop(key)
+        size = len(content.encode('utf-8'))
+        self.index[key] = {'size': size, 'lastUsed': time.time()}
+        self.total_bytes += size
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Verwirft die am längsten ungenutzten Einträge, bis die Zielgröße eingehalten wird."""
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TARGET
+        for key in sorted(self.index, key=lambda k: self.index[k]['lastUsed']):
+            self._drop(key)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            if self.total_bytes <= target:
+                break
+
+    def artifact_key(self, kind: str, sensor: Dict, content_hash: Optional[str] = None) -> str:
+        return f"{CACHE_VERSION}:{kind}:{content_hash or sensor_content_hash(sensor)}"
+
+    def get_or_compute(self, kind: str, sensor: Dict, compute: Callable[[Dict], object],
+                       content_hash: Optional[str] = None):
+        """Liefert das Artefakt aus dem Cache oder berechnet und speichert es."""
+        key = self.artifact_key(kind, sensor, content_hash)
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute(sensor)
+        self.put(key, value)
+        return value
+
+    def save(self) -> None:
+        """Schreibt den Index (Größen und letzte Nutzung) zurück."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.index_path, 'w', encoding='utf-8') as file:
+            json.dump(self.index, file)
+
+def compute_sensor_stats(sensor: Dict) -> Dict:
+    """Anzahl, Minimum, Maximum und Mittelwert je Messgröße."""
+    stats = {}
+    for entry in sensor.get('history') or []:
+        for key, value in entry.get('data', {}).items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            metric = stats.setdefault(key, {'count': 0, 'min': value, 'max': value, 'sum': 0.0})
+            metric['count'] += 1
+            metric['min'] = min(metric['min'], value)
+            metric['max'] = max(metric['max'], value)
+            metric['sum'] += value
+    for metric in stats.values():
+        metric['mean'] = metric.pop('sum') / metric['count']
+    return stats
+
+def compute_timestamp_range(sensor: Dict) -> Optional[List[str]]:
+    """Ältester und neuester Zeitstempel der History."""
+    history = sensor.get('history') or []
+    if not history:
+        return None
+    times = [parse_timestamp(entry['timestamp']) for entry in history]
+    return [min(times).isoformat(), max(times).isoformat()]
+
+def compute_door_intervals(sensor: Dict) -> List[List[str]]:
+    """Öffnungsintervalle [start, ende] eines Türsensors (ende ist None, solange offen)."""
+    parameters = sensor.get('parameters') or {}
+    limit = parameters.get('targetDistance', 0) + parameters.get('tolerance', 5)
+    intervals = []
+    open_since = None
+    for entry in sorted_history(sensor):
+        is_open = entry['data'].get('distance', 0) > limit
+        if is_open and open_since is None:
+            open_since = entry['timestamp']
+        elif not is_open and open_since is not None:
+            intervals.append([open_since, entry['timestamp']])
+            open_since = None
+    if open_since is not None:
+        intervals.append([open_since, None])
+    return intervals
+
+ARTIFACTS = {
+    'stats': compute_sensor_stats,
+    'timestampRange': compute_timestamp_range,
+    'status': calculate_sensor_status,
+    'doorIntervals': compute_door_intervals
+}
+
+def derive_all(data: Dict, cache: DerivedCache, kinds: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Liefert die gewünschten Artefakte für alle Sensoren (sensor_id -> Art -> Wert)."""
+    kinds = kinds or list(ARTIFACTS)
+    results = {}
+    for sensor in data.get('sensors', []):
+        content_hash = sensor_content_hash(sensor)
+        results[str(sensor['id'])] = {
+            kind: cache.get_or_compute(kind, sensor, ARTIFACTS[kind], content_hash)
+            for kind in kinds
+            if kind != 'doorIntervals' or sensor_kind(sensor) == 'door'
+        }
+    cache.save()
+    return results
+
+def main():
+    data = load_sensor_data()
+    cache = DerivedCache()
+
+    started = time.perf_counter()
+    results = derive_all(data, cache)
+    duration = time.perf_counter() - started
+
+    status_counts = {}
+    for artifacts in results.values():
+        status_counts[artifacts['status']] = status_counts.get(artifacts['status'], 0) + 1
+
+    print("\nStatus-Verteilung:")
+    for status, count in status_counts.items():
+        print(f"{status}: {count} Sensoren")
+    print(f"\n{cache.hits} Treffer, {cache.misses} neu berechnet ({duration * 1000:.0f} ms).")
+
+if __name__ == "__main__":
+    main()
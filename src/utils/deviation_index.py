@@ -0,0 +1,143 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from sensor_history import load_sensor_data, sorted_history, sensor_kind, calculate_fill_level
+
+# Messgröße -> (Zielwert-Parameter, Toleranz-Parameter, Standardziel, Standardtoleranz)
+# Standardwerte wie in calculateSensorStatus
+DEVIATION_PARAMETERS = {
+    'temperature': ('targetTemperature', 'tempTolerance', 21, 2),
+    'humidity': ('targetHumidity', 'humidityTolerance', 50, 10),
+    'co2': ('targetCO2', 'co2Tolerance', 800, 200),
+    'voltage': ('targetVoltage', 'voltageTolerance', 230, 10),
+    'current': ('targetCurrent', 'currentTolerance', 10, 1)
+}
+
+def deviation_scores(sensor: Dict, values: Dict) -> Dict[str, float]:
+    """
+    Abweichung vom Ziel in Vielfachen der Toleranz (>1 Warnung, >2 kritisch).
+    Für Füllstände zählt der fehlende Füllstand in Prozentpunkten (höher = leerer).
+    """
+    parameters = sensor.get('parameters') or {}
+    scores = {}
+    if sensor_kind(sensor) == 'fill':
+        if 'distance' in values:
+            level = calculate_fill_level(values['distance'], parameters)
+            if level is not None:
+                scores['fillLevel'] = 100 - level
+        return scores
+
+    for metric, (target_key, tolerance_key, default_target, default_tolerance) in DEVIATION_PARAMETERS.items():
+        value = values.get(metric)
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            continue
+        target = parameters.get(target_key) or default_target
+        tolerance = parameters.get(tolerance_key) or default_tolerance
+        scores[metric] = abs(value - target) / tolerance
+    return scores
+
+class DeviationIndex:
+    """
+    Hält pro Messgröße einen Max-Heap der aktuellen Abweichungen aller Sensoren.
+    Neue Messwerte werden in O(log n) eingetragen; veraltete Heap-Einträge werden
+    erst beim Abfragen verworfen (Lazy Deletion), sodass Top-K- und Schwellwert-
+    Abfragen nur die obersten Einträge ansehen statt alle Sensoren.
+    Jeder Heap-Eintrag trägt eine laufende Nummer; gültig ist nur der Eintrag mit der
+    aktuellen Nummer des Sensors, auch wenn ein früherer Score wieder erreicht wird.
+
+    >>> index = DeviationIndex()
+    >>> for temperature in (30, 21, 30):
+    ...     index.update({'id': 1, 'type': 'climate'}, {'temperature': temperature})
+    >>> index.update({'id': 2, 'type': 'climate'}, {'temperature': 25})
+    >>> index.top_k('temperature', 3)
+    [('1', 4.5), ('2', 2.0)]
+    >>> index.above('temperature', 1)
+    [('1', 4.5), ('2', 2.0)]
+    >>> index.worst_overall(3)
+    [('1', 'temperature', 4.5), ('2', 'temperature', 2.0)]
+    """
+
+    def __init__(self):
+        # metric -> Heap aus (-score, seq, sensor_id)
+        self.heaps = {}
+        # metric -> sensor_id -> (aktueller score, seq)
+        self.current = {}
+        self.seq = 0
+
+    def update(self, sensor: Dict, values: Optional[Dict] = None) -> None:
+        """Trägt den neuesten Messwert eines Sensors ein (Standard: sensor['data'])."""
+        sensor_id = str(sensor['id'])
+        for metric, score in deviation_scores(sensor, values if values is not None else sensor.get('data') or {}).items():
+            scores = self.current.setdefault(metric, {})
+            previous = scores.get(sensor_id)
+            if previous is not None and previous[0] == score:
+                continue
+            self.seq += 1
+            scores[sensor_id] = (score, self.seq)
+            heap = self.heaps.setdefault(metric, [])
+            heapq.heappush(heap, (-score, self.seq, sensor_id))
+            # Heap neu aufbauen, wenn zu viele veraltete Einträge enthalten sind
+            if len(heap) > 2 * len(scores) + 64:
+                self.heaps[metric] = [(-value, seq, key) for key, (value, seq) in scores.items()]
+                heapq.heapify(self.heaps[metric])
+
+    def remove(self, sensor_id) -> None:
+        for scores in self.current.values():
+            scores.pop(str(sensor_id), None)
+
+    def _is_current(self, metric: str, entry: Tuple[float, int, str]) -> bool:
+        current = self.current[metric].get(entry[2])
+        return current is not None and current[1] == entry[1]
+
+    def _take(self, metric: str, stop) -> List[Tuple[str, float]]:
+        """Entnimmt gültige Einträge von oben, bis stop(anzahl, score) greift, und legt sie zurück."""
+        heap = self.heaps.get(metric, [])
+        taken = []
+        while heap:
+            entry = heap[0]
+            if not self._is_current(metric, entry):
+                heapq.heappop(heap)
+                continue
+            if stop(len(taken), -entry[0]):
+                break
+            taken.append(heapq.heappop(heap))
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return [(sensor_id, -negative) for negative, _, sensor_id in taken]
+
+    def top_k(self, metric: str, k: int = 20) -> List[Tuple[str, float]]:
+        """Die k Sensoren mit der größten Abweichung (absteigend)."""
+        return self._take(metric, lambda count, score: count >= k)
+
+    def above(self, metric: str, threshold: float) -> List[Tuple[str, float]]:
+        """Alle Sensoren mit Abweichung über dem Schwellwert (absteigend)."""
+        return self._take(metric, lambda count, score: score <= threshold)
+
+    def worst_overall(self, k: int = 20) -> List[Tuple[str, str, float]]:
+        """Die k schlechtesten (Sensor, Messgröße)-Paare über alle Toleranz-Messgrößen."""
+        candidates = []
+        for metric in DEVIATION_PARAMETERS:
+            candidates.extend((score, sensor_id, metric) for sensor_id, score in self.top_k(metric, k))
+        return [(sensor_id, metric, score) for score, sensor_id, metric in heapq.nlargest(k, candidates)]
+
+def build_index(data: Dict) -> DeviationIndex:
+    index = DeviationIndex()
+    for sensor in data.get('sensors', []):
+        history = sorted_history(sensor)
+        index.update(sensor, history[-1]['data'] if history else sensor.get('data'))
+    return index
+
+def main():
+    data = load_sensor_data()
+    index = build_index(data)
+
+    print("\nGrößte Abweichungen vom Sollwert:")
+    for sensor_id, metric, score in index.worst_overall(20):
+        print(f"Sensor {sensor_id} {metric}: {score:.1f}x Toleranz")
+
+    print("\nRegale, die zuerst leer werden:")
+    for sensor_id, missing in index.top_k('fillLevel', 10):
+        print(f"Sensor {sensor_id}: Füllstand {100 - missing:.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+// utils/doorIntervals.js
+
+// Index-Cache pro History-Array, damit die Umwandlung nur einmal erfolgt
+const indexCache = new WeakMap();
+
+/**
+ * Wandelt den Abstandsverlauf eines Türsensors in Öffnungsintervalle um.
+ * @param {Array} history - Sensorverlauf mit timestamps und Abstandswerten (beliebig sortiert)
+ * @param {Object} parameters - Sensorparameter mit targetDistance und tolerance
+ * @returns {Array} Intervalle { start, end, lastOpen } in ms, end ist null solange die Tür offen ist,
+ *   lastOpen ist der letzte Messwert mit offener Tür
+ */
+export const buildDoorIntervals = (history, parameters = {}) => {
+  if (!history || history.length === 0) return [];
+
+  const { targetDistance = 0, tolerance = 5 } = parameters;
+  const samples = history
+    .map(entry => ({
+      time: new Date(entry.timestamp).getTime(),
+      isOpen: entry.data.distance > (targetDistance + tolerance)
+    }))
+    .sort((a, b) => a.time - b.time);
+
+  const intervals = [];
+  let openSince = null;
+  let lastOpen = null;
+
+  for (const sample of samples) {
+    if (sample.isOpen) {
+      if (openSince === null) openSince = sample.time;
+      lastOpen = sample.time;
+    } else if (openSince !== null) {
+      intervals.push({ start: openSince, end: sample.time, lastOpen });
+      openSince = null;
+    }
+  }
+
+  if (openSince !== null) {
+    intervals.push({ start: openSince, end: null, lastOpen });
+  }
+
+  return intervals;
+};
+
+// Erste Position in einem aufsteigend sortierten Array mit Wert >= target
+const lowerBound = (values, target) => {
+  let low = 0;
+  let high = values.length;
+  while (low < high) {
+    const mid = (low + high) >>> 1;
+    if (values[mid] < target) low = mid + 1;
+    else high = mid;
+  }
+  return low;
+};
+
+/**
+ * Index über die Öffnungsintervalle eines Türsensors.
+ * Zählungen und Abfragen laufen per Binärsuche über die Ereignisliste.
+ */
+export class DoorIntervalIndex {
+  constructor(intervals) {
+    this.intervals = intervals;
+    this.starts = intervals.map(interval => interval.start);
+    // Abgeschlossene Öffnungen nach Dauer sortiert für "länger als X"-Abfragen
+    this.byDuration = intervals
+      .filter(interval => interval.end !== null)
+      .sort((a, b) => (a.end - a.start) - (b.end - b.start));
+    this.durations = this.byDuration.map(interval => interval.end - interval.start);
+  }
+
+  static fromHistory(history, parameters = {}) {
+    return new DoorIntervalIndex(buildDoorIntervals(history, parameters));
+  }
+
+  /**
+   * Anzahl der Öffnungen, die im Zeitraum [from, to) begonnen haben.
+   */
+  countOpenings(from, to = Infinity) {
+    return lowerBound(this.starts, to) - lowerBound(this.starts, from);
+  }
+
+  /**
+   * Liefert die Öffnung, die vor dem Zeitpunkt begonnen hat und ab ihm noch als offen gemessen wurde, sonst null.
+   */
+  openingAt(time) {
+    const position = lowerBound(this.starts, time) - 1;
+    if (position < 0) return null;
+    const interval = this.intervals[position];
+    return interval.lastOpen >= time ? interval : null;
+  }
+
+  /**
+   * Liefert die laufende Öffnung oder null, wenn die Tür geschlossen ist.
+   */
+  currentOpening() {
+    const last = this.intervals[this.intervals.length - 1];
+    return last && last.end === null ? last : null;
+  }
+
+  /**
+   * Aktuelle Öffnungsdauer in Minuten (0 wenn geschlossen).
+   */
+  currentOpenDuration(now = Date.now()) {
+    const opening = this.currentOpening();
+    if (!opening) return 0;
+    return Math.max(0, Math.floor((now - opening.start) / (1000 * 60)));
+  }
+
+  /**
+   * Anzahl der abgeschlossenen Öffnungen, die länger als die angegebene Dauer waren.
+   */
+  countOpenLongerThan(minutes) {
+    const threshold = minutes * 60 * 1000;
+    // Erste Dauer > threshold
+    return this.durations.length - lowerBound(this.durations, threshold + 1);
+  }
+
+  /**
+   * Öffnungen, die länger als die angegebene Dauer waren (neueste zuerst).
+   * Eine noch laufende Öffnung zählt mit, sobald sie die Dauer überschreitet.
+   */
+  openLongerThan(minutes, now = Date.now()) {
+    const threshold = minutes * 60 * 1000;
+    // Nur die Treffer hinter der Binärsuche werden kopiert und nach Beginn sortiert
+    const matches = this.byDuration.slice(lowerBound(this.durations, threshold + 1));
+    const opening = this.currentOpening();
+    if (opening && now - opening.start > threshold) {
+      matches.push(opening);
+    }
+    return matches.sort((a, b) => b.start - a.start);
+  }
+
+  /**
+   * Durchschnittliche Dauer abgeschlossener Öffnungen in Minuten.
+   */
+  averageDuration() {
+    if (this.durations.length === 0) return 0;
+    const total = this.durations.reduce((sum, duration) => sum + duration, 0);
+    return total / this.durations.length / (1000 * 60);
+  }
+}
+
+/**
+ * Liefert den (gecachten) Intervallindex für eine Sensor-History.
+ * @param {Array} history - Sensorverlauf
+ * @param {Object} parameters - Sensorparameter mit targetDistance und tolerance
+ * @returns {DoorIntervalIndex}
+ */
+export const getDoorIntervalIndex = (history, parameters = {}) => {
+  const { targetDistance = 0, tolerance = 5 } = parameters;
+  const key = `${targetDistance}:${tolerance}`;
+
+  let cached = indexCache.get(history);
+  if (!cached || cached.key !== key || cached.length !== history.length) {
+    cached = { key, length: history.length, index: DoorIntervalIndex.fromHistory(history, parameters) };
+    indexCache.set(history, cached);
+  }
+  return cached.index;
+};
@@ -0,0 +1,208 @@
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sensor_history import load_sensor_data, parse_timestamp, sorted_history, sensor_kind, history_rewritten
+
+# Zustand der Energiebuchhaltung (letzter verbuchter Messwert und Summen)
+ENERGY_STATE_PATH = os.path.join('src', 'data', 'energyLedger.json')
+# Lücken über dieser Dauer werden nicht integriert (Sensor offline)
+MAX_GAP = timedelta(hours=1)
+# Strompreis für den Kostenbericht in Euro pro kWh
+PRICE_PER_KWH = 0.30
+
+class EnergyLedger:
+    """
+    Integriert Leistung (voltage * current) über die Messintervalle zu kWh.
+    Die Werte werden pro Sensor, Asset, Raum und Filiale in Stunden- und
+    Tagesbuckets geführt und bei neuen Messwerten nur inkrementell ergänzt.
+    """
+
+    def __init__(self):
+        # sensor_id -> {'timestamp': iso, 'power': W, 'firstTimestamp': iso, 'assetId': ..., 'roomId': ...}
+        self.last_samples = {}
+        # scope -> entity_id -> bucket -> kWh
+        self.hourly = {scope: defaultdict(lambda: defaultdict(float)) for scope in ('sensor', 'asset', 'room', 'store')}
+        self.daily = {scope: defaultdict(lambda: defaultdict(float)) for scope in ('sensor', 'asset', 'room', 'store')}
+
+    def _book(self, sensor: Dict, start: datetime, end: datetime, power_start: float, power_end: float) -> None:
+        """Verbucht ein Intervall (Trapezregel) und teilt es an Stundengrenzen auf."""
+        total_seconds = (end - start).total_seconds()
+        entities = {
+            'sensor': str(sensor['id']),
+            'asset': sensor.get('assetId'),
+            'room': sensor.get('roomId'),
+            'store': 'store'
+        }
+
+        segment_start = start
+        while segment_start < end:
+            next_hour = segment_start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            segment_end = min(end, next_hour)
+
+            # Leistung linear zwischen den beiden Messpunkten interpolieren
+            fraction_start = (segment_start - start).total_seconds() / total_seconds
+            fraction_end = (segment_end - start).total_seconds() / total_seconds
+            p_start = power_start + (power_end - power_start) * fraction_start
+            p_end = power_start + (power_end - power_start) * fraction_end
+            hours = (segment_end - segment_start).total_seconds() / 3600
+            kwh = (p_start + p_end) / 2 * hours / 1000
+
+            hour_bucket = segment_start.strftime('%Y-%m-%dT%H:00')
+            day_bucket = segment_start.strftime('%Y-%m-%d')
+            for scope, entity_id in entities.items():
+                if entity_id is None:
+                    continue
+                self.hourly[scope][entity_id][hour_bucket] += kwh
+                self.daily[scope][entity_id][day_bucket] += kwh
+
+            segment_start = segment_end
+
+    def add_sample(self, sensor: Dict, timestamp: str, voltage: float, current: float) -> None:
+        """
+        Verbucht einen neuen Messwert relativ zum zuletzt verbuchten Wert des Sensors.
+        Deadband-Sensoren melden nur Änderungen: Die Leistung gilt bis zur nächsten Meldung
+        unverändert (Treppenfunktion), Lücken bis zum doppelten Heartbeat sind normal.
+        """
+        sensor_id = str(sensor['id'])
+        power = voltage * current
+        last = self.last_samples.get(sensor_id)
+
+        if last is not None:
+            start = parse_timestamp(last['timestamp'])
+            end = parse_timestamp(timestamp)
+            if end <= start:
+                # Bereits verbucht oder außer der Reihe
+                return
+            sampling = sensor.get('sampling') or {}
+            if sampling.get('mode') == 'deadband':
+                heartbeat = timedelta(minutes=sampling.get('heartbeatMinutes', 60))
+                if end - start <= 2 * heartbeat:
+                    self._book(sensor, start, end, last['power'], last['power'])
+            elif end - start <= MAX_GAP:
+                self._book(sensor, start, end, last['power'], power)
+
+        self.last_samples[sensor_id] = {
+            'timestamp': timestamp,
+            'power': power,
+            'firstTimestamp': last['firstTimestamp'] if last and 'firstTimestamp' in last else timestamp,
+            'assetId': sensor.get('assetId'),
+            'roomId': sensor.get('roomId')
+        }
+
+    def remove_sensor(self, sensor_id) -> None:
+        """Nimmt alle Buchungen eines Sensors zurück (auch aus Asset-, Raum- und Filialsummen)."""
+        sensor_id = str(sensor_id)
+        last = self.last_samples.pop(sensor_id, None) or {}
+        entities = {'asset': last.get('assetId'), 'room': last.get('roomId'), 'store': 'store'}
+        for buckets in (self.hourly, self.daily):
+            for bucket, kwh in buckets['sensor'].pop(sensor_id, {}).items():
+                for scope, entity_id in entities.items():
+                    if entity_id is None or entity_id not in buckets[scope]:
+                        continue
+                    values = buckets[scope][entity_id]
+                    values[bucket] -= kwh
+                    # Rundungsreste nicht als Buckets stehen lassen
+                    if abs(values[bucket]) < 1e-9:
+                        del values[bucket]
+                    if not values:
+                        del buckets[scope][entity_id]
+
+    def update(self, data: Dict) -> int:
+        """Verbucht alle Messwerte, die neuer als der letzte verbuchte Wert sind."""
+        energy_sensors = [sensor for sensor in data.get('sensors', []) if sensor_kind(sensor) == 'energy']
+
+        # Buchungen entfernter Sensoren aus allen Summen zurücknehmen
+        current_ids = {str(sensor['id']) for sensor in energy_sensors}
+        for sensor_id in [sensor_id for sensor_id in self.last_samples if sensor_id not in current_ids]:
+            self.remove_sensor(sensor_id)
+
+        added = 0
+        for sensor in energy_sensors:
+            sensor_id = str(sensor['id'])
+            last = self.last_samples.get(sensor_id)
+            if last is not None and (last.get('assetId'), last.get('roomId')) != (sensor.get('assetId'), sensor.get('roomId')):
+                # Sensor wurde verschoben: unter Asset und Raum neu verbuchen
+                self.remove_sensor(sensor_id)
+                last = None
+            last_time = parse_timestamp(last['timestamp']) if last else None
+            history = sorted_history(sensor)
+
+            # History ist aufsteigend sortiert, nur das Ende ist neu
+            new_entries = count_new_entries(history, last_time)
+            if last is not None and history_rewritten(history[:len(history) - new_entries], last['timestamp'],
+                                                       last.get('firstTimestamp')):
+                # Zeitstempel verschoben (update_timestamps.py) oder History ersetzt: Sensor neu verbuchen
+                self.remove_sensor(sensor_id)
+                new_entries = len(history)
+            for entry in history[len(history) - new_entries:]:
+                values = entry.get('data', {})
+                if 'voltage' in values and 'current' in values:
+                    self.add_sample(sensor, entry['timestamp'], values['voltage'], values['current'])
+            added += new_entries
+        return added
+
+    def totals(self, scope: str, period: str = 'daily') -> Dict[str, Dict[str, float]]:
+        """Liefert die kWh-Summen eines Bereichs ('sensor', 'asset', 'room', 'store')."""
+        buckets = self.daily if period == 'daily' else self.hourly
+        return {entity_id: dict(values) for entity_id, values in buckets[scope].items()}
+
+    def to_dict(self) -> Dict:
+        return {
+            'lastSamples': self.last_samples,
+            'hourly': {scope: {k: dict(v) for k, v in values.items()} for scope, values in self.hourly.items()},
+            'daily': {scope: {k: dict(v) for k, v in values.items()} for scope, values in self.daily.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'EnergyLedger':
+        ledger = cls()
+        ledger.last_samples = state.get('lastSamples', {})
+        for period, buckets in (('hourly', ledger.hourly), ('daily', ledger.daily)):
+            for scope, entities in state.get(period, {}).items():
+                for entity_id, values in entities.items():
+                    buckets[scope][entity_id].update(values)
+        return ledger
+
+def count_new_entries(history: List[Dict], last_time: Optional[datetime]) -> int:
+    """Anzahl der History-Einträge (vom Ende her), die nach last_time liegen."""
+    count = 0
+    for entry in reversed(history):
+        if last_time is not None and parse_timestamp(entry['timestamp']) <= last_time:
+            break
+        count += 1
+    return count
+
+def load_ledger(file_path: str = ENERGY_STATE_PATH) -> EnergyLedger:
+    """Lädt den gespeicherten Zustand oder beginnt eine neue Buchhaltung."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return EnergyLedger.from_dict(json.load(file))
+    except FileNotFoundError:
+        return EnergyLedger()
+
+def save_ledger(ledger: EnergyLedger, file_path: str = ENERGY_STATE_PATH) -> None:
+    """Speichert den Zustand der Buchhaltung."""
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump(ledger.to_dict(), file, indent=2)
+
+def main():
+    data = load_sensor_data()
+    ledger = load_ledger()
+    added = ledger.update(data)
+    save_ledger(ledger)
+    print(f"{added} neue Messwerte verbucht.")
+
+    room_names = {room['id']: room['name'] for room in data.get('rooms', [])}
+    print("\nEnergieverbrauch pro Raum und Tag:")
+    for room_id, days in ledger.totals('room').items():
+        for day, kwh in sorted(days.items()):
+            print(f"{room_names.get(room_id, room_id)} {day}: {kwh:.2f} kWh ({kwh * PRICE_PER_KWH:.2f} €)")
+
+    store_total = sum(ledger.totals('store').get('store', {}).values())
+    print(f"\nGesamt: {store_total:.2f} kWh ({store_total * PRICE_PER_KWH:.2f} €)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import heapq
+import json
+import time
+import urllib.request
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sensor_history import JSON_FILE_PATH, load_sensor_data, parse_timestamp, sorted_history
+
+# Obergrenze der History, die pro Sensor an den Server übertragen wird (eine Woche Türdaten)
+MAX_REPLAY_HISTORY = 2016
+# Spätestens nach so vielen Ereignissen wird ein Stapel veröffentlicht
+MAX_BATCH_EVENTS = 500
+# Intervall für Fortschrittsmeldungen in Sekunden
+REPORT_INTERVAL = 10
+
+def sensor_events(index: int, sensor: Dict) -> Iterator[Tuple[datetime, int, Dict]]:
+    for entry in sorted_history(sensor):
+        yield parse_timestamp(entry['timestamp']), index, entry
+
+def merged_events(sensors: List[Dict], start: Optional[datetime] = None) -> Iterator[Tuple[datetime, int, Dict]]:
+    """
+    Liefert die Messwerte aller Sensoren in zeitlicher Reihenfolge.
+    heapq.merge hält nur den jeweils nächsten Eintrag pro Sensor, es entsteht keine globale sortierte Liste.
+    """
+    events = heapq.merge(*(sensor_events(index, sensor) for index, sensor in enumerate(sensors)),
+                         key=lambda event: (event[0], event[1]))
+    for event in events:
+        if start is None or event[0] >= start:
+            yield event
+
+def retimed(original: str, timestamp: datetime) -> str:
+    """Verschobener Zeitstempel im Format des Originals (UTC mit 'Z', sonst ohne Zeitzone)."""
+    return timestamp.isoformat() + ('Z' if original.endswith('Z') else '')
+
+class MemoryPublisher:
+    """Stand-in ohne Server: führt die Sensoren nur im Speicher nach."""
+
+    def __init__(self, sensors: List[Dict]):
+        self.sensors = {str(sensor['id']): sensor for sensor in sensors}
+        self.published = 0
+
+    def publish(self, updates: Dict[str, Dict]) -> None:
+        for sensor_id, update in updates.items():
+            self.sensors[sensor_id].update(update)
+        self.published += len(updates)
+
+class ServerPublisher:
+    """Veröffentlicht die Messwerte per PATCH /api/data/sensors/:id an den lokalen Server."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self.published = 0
+        self.errors = 0
+
+    def publish(self, updates: Dict[str, Dict]) -> None:
+        for sensor_id, update in updates.items():
+            request = urllib.request.Request(
+                f"{self.base_url}/api/data/sensors/{sensor_id}",
+                data=json.dumps(update).encode('utf-8'),
+                headers={'Content-Type': 'application/json'},
+                method='PATCH'
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                self.published += 1
+            except OSError as error:
+                self.errors += 1
+                print(f"Fehler beim Senden für Sensor {sensor_id}: {error}")
+
+class HistoryReplay:
+    """
+    Spielt die History eines Datensatzes zeitgerafft ab (1x bis 1000x).
+    Sensor-`data` und `history` wachsen dabei so, als kämen die Messwerte live an.
+    Ereignisse, die im selben Takt fällig sind, werden pro Sensor zusammengefasst.
+    """
+
+    def __init__(self, data: Dict, publisher, speed: float = 60.0, start: Optional[datetime] = None,
+                 retime: bool = False):
+        if not 1 <= speed <= 1000:
+            raise ValueError("Die Beschleunigung muss zwischen 1 und 1000 liegen.")
+        self.sensors = data.get('sensors', [])
+        self.publisher = publisher
+        self.speed = speed
+        self.start = start
+        self.retime = retime
+        self.replayed_history = {str(sensor['id']): deque(maxlen=MAX_REPLAY_HISTORY) for sensor in self.sensors}
+        self.events = 0
+
+    def _flush(self, pending: Dict[str, Dict]) -> None:
+        if pending:
+            # History erst beim Veröffentlichen kopieren, nicht bei jedem Ereignis
+            self.publisher.publish({sensor_id: {'data': update['data'], 'history': list(update['history'])}
+                                    for sensor_id, update in pending.items()})
+            pending.clear()
+
+    def run(self, limit: Optional[int] = None) -> Dict:
+        wall_start = time.perf_counter()
+        last_report = wall_start
+        first_time = None
+        offset = timedelta(0)
+        pending = {}
+
+        for timestamp, index, entry in merged_events(self.sensors, self.start):
+            if first_time is None:
+                first_time = timestamp
+                if self.retime:
+                    # Zeitstempel so verschieben, dass die Wiedergabe jetzt beginnt
+                    offset = datetime.now().replace(microsecond=0) - first_time
+
+            due = wall_start + (timestamp - first_time).total_seconds() / self.speed
+            if due > time.perf_counter():
+                # Bis zur Fälligkeit warten, vorher alles Angefallene veröffentlichen
+                self._flush(pending)
+                time.sleep(max(0.0, due - time.perf_counter()))
+
+            sensor_id = str(self.sensors[index]['id'])
+            replayed = {
+                'timestamp': retimed(entry['timestamp'], timestamp + offset) if self.retime else entry['timestamp'],
+                'data': entry['data']
+            }
+            history = self.replayed_history[sensor_id]
+            history.append(replayed)
+            pending[sensor_id] = {'data': replayed['data'], 'history': history}
+            self.events += 1
+
+            if len(pending) >= MAX_BATCH_EVENTS:
+                self._flush(pending)
+
+            now = time.perf_counter()
+            if now - last_report >= REPORT_INTERVAL:
+                print_rates(self.rates(now - wall_start, timestamp - first_time))
+                last_report = now
+
+            if limit is not None and self.events >= limit:
+                break
+
+        self._flush(pending)
+        elapsed = time.perf_counter() - wall_start
+        simulated = (timestamp - first_time) if first_time is not None else timedelta(0)
+        return self.rates(elapsed, simulated)
+
+    def rates(self, elapsed: float, simulated: timedelta) -> Dict:
+        """Erreichte gegenüber angestrebter Ereignisrate."""
+        simulated_seconds = simulated.total_seconds()
+        target_duration = simulated_seconds / self.speed
+        return {
+            'events': self.events,
+            'elapsed': elapsed,
+            'simulated': simulated_seconds,
+            'achievedRate': self.events / elapsed if elapsed > 0 else 0.0,
+            'targetRate': self.events / target_duration if target_duration > 0 else 0.0,
+            'achievedSpeed': simulated_seconds / elapsed if elapsed > 0 else 0.0
+        }
+
+def print_rates(rates: Dict) -> None:
+    print(f"{rates['events']} Ereignisse in {rates['elapsed']:.1f} s: "
+          f"{rates['achievedRate']:.1f}/s erreicht, {rates['targetRate']:.1f}/s angestrebt "
+          f"(Beschleunigung {rates['achievedSpeed']:.0f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Zeitgeraffte Wiedergabe einer sensorData.json oder eines Backups")
+    parser.add_argument('file', nargs='?', default=JSON_FILE_PATH, help="Datensatz oder Backup-Datei")
+    parser.add_argument('--speed', type=float, default=60, help="Beschleunigung (1-1000)")
+    parser.add_argument('--url', help="Server, an den veröffentlicht wird (z.B. http://localhost:3001). "
+                                      "Ohne Angabe läuft die Wiedergabe nur im Speicher.")
+    parser.add_argument('--start', help="Startzeitpunkt (ISO), frühere Messwerte werden übersprungen")
+    parser.add_argument('--retime', action='store_true', help="Zeitstempel auf die aktuelle Zeit verschieben")
+    args = parser.parse_args()
+
+    data = load_sensor_data(args.file)
+    publisher = ServerPublisher(args.url) if args.url else MemoryPublisher(data.get('sensors', []))
+    start = parse_timestamp(args.start) if args.start else None
+
+    replay = HistoryReplay(data, publisher, args.speed, start, args.retime)
+    print(f"Wiedergabe von {len(replay.sensors)} Sensoren mit {args.speed:.0f}x...")
+    try:
+        rates = replay.run()
+    except KeyboardInterrupt:
+        print("\nWiedergabe abgebrochen.")
+        return
+    print("\nErgebnis:")
+    print_rates(rates)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import argparse
+import asyncio
+import importlib.util
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_SCRIPT = os.path.join(UTILS_DIR, 'server.js')
+DEFAULT_PORT = 3101
+
+def load_shop_generator():
+    """Lädt shop-data-generator.py (Bindestrich im Dateinamen, daher über importlib)."""
+    spec = importlib.util.spec_from_file_location(
+        'shop_data_generator', os.path.join(UTILS_DIR, 'shop-data-generator.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def generate_dataset(stores: int = 1) -> Dict:
+    """Erzeugt einen Datensatz mit dem Shop-Generator, bei stores > 1 mehrere Filialen zusammengeführt."""
+    generator_module = load_shop_generator()
+    dataset = {"sensors": [], "rooms": [], "assets": [], "categories": [], "favorites": []}
+    for _ in range(stores):
+        shop_data = generator_module.ShopDataGenerator().generate()
+        for key in dataset:
+            dataset[key].extend(shop_data.get(key, []))
+    return dataset
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Perzentil (nearest rank) einer aufsteigend sortierten Liste."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+async def http_request(host: str, port: int, method: str, path: str,
+                       body: Optional[Dict] = None, timeout: float = 30.0) -> Tuple[int, int]:
+    """Minimaler HTTP/1.1-Client auf asyncio-Basis. Liefert (Statuscode, Antwortgröße)."""
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    headers = [
+        f"{method} {path} HTTP/1.1",
+        f"Host: {host}:{port}",
+        "Connection: close",
+        "Accept: application/json"
+    ]
+    if body is not None:
+        headers.append("Content-Type: application/json")
+        headers.append(f"Content-Length: {len(payload)}")
+    request = ("\r\n".join(headers) + "\r\n\r\n").encode('ascii') + payload
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(request)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        status_line = response.split(b"\r\n", 1)[0].decode('ascii', 'replace')
+        return int(status_line.split(" ")[1]), len(response)
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+class LoadTest:
+    """
+    Treibt eine konfigurierbare Mischung aus Lese- (GET /api/data) und
+    Schreibzugriffen (PATCH /api/data/sensors/:id) gegen den Server und
+    sammelt Latenzen und Fehler pro Endpunkt.
+    """
+
+    def __init__(self, base_url: str, sensors: List[Dict], concurrency: int = 10,
+                 write_ratio: float = 0.1, duration: float = 30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 80
+        # (id, aktuelle Messwerte) pro Sensor, damit PATCHes die passende Form haben
+        self.sensors = [(sensor['id'], sensor.get('data') or {}) for sensor in sensors]
+        self.concurrency = concurrency
+        self.write_ratio = write_ratio
+        self.duration = duration
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def next_request(self) -> Tuple[str, str, str, Optional[Dict]]:
+        """Wählt die nächste Anfrage gemäß Lese-/Schreibmischung."""
+        if self.sensors and random.random() < self.write_ratio:
+            # Jeder Sensor erhält seine eigenen aktuellen Messwerte zurück (kein Klima-Wert auf Türsensoren)
+            sensor_id, data = random.choice(self.sensors)
+            body = {"data": data}
+            return "PATCH /api/data/:entityType/:entityId", "PATCH", f"/api/data/sensors/{sensor_id}", body
+        return "GET /api/data", "GET", "/api/data", None
+
+    async def worker(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            endpoint, method, path, body = self.next_request()
+            started = time.perf_counter()
+            try:
+                status, _ = await http_request(self.host, self.port, method, path, body)
+                if status >= 400:
+                    self.errors[endpoint] += 1
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                self.errors[endpoint] += 1
+            self.latencies[endpoint].append(time.perf_counter() - started)
+
+    async def run(self) -> Dict:
+        started = time.perf_counter()
+        deadline = started + self.duration
+        await asyncio.gather(*(self.worker(deadline) for _ in range(self.concurrency)))
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed: float) -> Dict:
+        """Durchsatz, p50/p95/p99-Latenz (ms) und Fehlerrate pro Endpunkt."""
+        results = {}
+        for endpoint, values in self.latencies.items():
+            values = sorted(values)
+            results[endpoint] = {
+                'requests': len(values),
+                'throughput': len(values) / elapsed,
+                'p50': percentile(values, 50) * 1000,
+                'p95': percentile(values, 95) * 1000,
+                'p99': percentile(values, 99) * 1000,
+                'errorRate': self.errors[endpoint] / len(values)
+            }
+        return results
+
+def start_server(data_file: str, port: int, log_file) -> subprocess.Popen:
+    """Startet server.js mit einer eigenen Datendatei auf dem angegebenen Port, Ausgaben gehen nach log_file."""
+    env = dict(os.environ, PORT=str(port), SENSOR_DATA_FILE=data_file)
+    return subprocess.Popen(['node', SERVER_SCRIPT], env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+def read_log(log_path: str) -> str:
+    with open(log_path, 'r', encoding='utf-8', errors='replace') as file:
+        return file.read().strip()
+
+async def wait_for_server(host: str, port: int, server: Optional[subprocess.Popen] = None,
+                          log_path: Optional[str] = None, timeout: float = 15.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        if server is not None and server.poll() is not None:
+            # Server ist beim Start abgestürzt (z.B. fehlendes express), nicht bis zum Timeout warten
+            output = read_log(log_path) if log_path else ''
+            raise RuntimeError(f"server.js wurde mit Code {server.returncode} beendet:\n{output}")
+        try:
+            await http_request(host, port, 'GET', '/api/ip', timeout=2)
+            return
+        except (OSError, asyncio.TimeoutError):
+            if time.perf_counter() > deadline:
+                output = read_log(log_path) if log_path else ''
+                raise RuntimeError(f"Server auf Port {port} nicht erreichbar\n{output}".rstrip())
+            await asyncio.sleep(0.2)
+
+async def fetch_json(host: str, port: int, path: str) -> Dict:
+    """Liest eine JSON-Antwort vollständig (für die Sensor-IDs eines laufenden Servers)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode('ascii'))
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    if b"transfer-encoding: chunked" in head.lower():
+        body = dechunk(body)
+    return json.loads(body.decode('utf-8'))
+
+def dechunk(body: bytes) -> bytes:
+    """Setzt einen HTTP-Body mit Transfer-Encoding: chunked zusammen."""
+    result = b''
+    while body:
+        size_line, _, rest = body.partition(b"\r\n")
+        size = int(size_line.split(b";")[0], 16)
+        if size == 0:
+            break
+        result += rest[:size]
+        body = rest[size + 2:]
+    return result
+
+def print_report(results: Dict) -> None:
+    print("\nErgebnisse:")
+    for endpoint, stats in results.items():
+        print(f"{endpoint}")
+        print(f"  Anfragen:   {stats['requests']} ({stats['throughput']:.1f}/s)")
+        print(f"  Latenz:     p50 {stats['p50']:.1f} ms, p95 {stats['p95']:.1f} ms, p99 {stats['p99']:.1f} ms")
+        print(f"  Fehlerrate: {stats['errorRate'] * 100:.2f} %")
+
+def main():
+    parser = argparse.ArgumentParser(description="Lasttest für die Dashboard-Daten-API")
+    parser.add_argument('--url', help="Bereits laufender Server (z.B. http://localhost:3001). "
+                                      "Ohne Angabe wird server.js mit generierten Daten gestartet.")
+    parser.add_argument('--stores', type=int, default=1, help="Anzahl generierter Filialen")
+    parser.add_argument('--concurrency', type=int, default=10, help="Parallele Clients")
+    parser.add_argument('--write-ratio', type=float, default=0.1, help="Anteil PATCH-Anfragen (0-1)")
+    parser.add_argument('--duration', type=float, default=30, help="Dauer in Sekunden")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port für den gestarteten Server")
+    parser.add_argument('--allow-writes', action='store_true',
+                        help="PATCH-Anfragen auch gegen --url senden (überschreibt dessen sensorData.json)")
+    args = parser.parse_args()
+
+    write_ratio = args.write_ratio
+    if args.url and write_ratio > 0 and not args.allow_writes:
+        # server.js hält nur wenige Backups, Last auf einen echten Server würde dessen Daten überschreiben
+        print("Hinweis: Gegen --url werden ohne --allow-writes nur Lesezugriffe gesendet.")
+        write_ratio = 0.0
+
+    server = None
+    temp_dir = None
+    log_file = None
+    try:
+        if args.url:
+            base_url = args.url
+            parts = urlsplit(base_url)
+            print("Lese Sensoren vom Server...")
+            data = asyncio.run(fetch_json(parts.hostname, parts.port or 80, '/api/data'))
+            sensors = data.get('sensors', [])
+        else:
+            print(f"Generiere Datensatz für {args.stores} Filiale(n)...")
+            dataset = generate_dataset(args.stores)
+            temp_dir = tempfile.mkdtemp(prefix='loadtest_')
+            data_file = os.path.join(temp_dir, 'sensorData.json')
+            with open(data_file, 'w', encoding='utf-8') as f:
+                json.dump(dataset, f, indent=2, ensure_ascii=False)
+            print(f"{len(dataset['sensors'])} Sensoren, {os.path.getsize(data_file) / 1e6:.1f} MB")
+
+            log_path = os.path.join(temp_dir, 'server.log')
+            log_file = open(log_path, 'w', encoding='utf-8')
+            server = start_server(data_file, args.port, log_file)
+            base_url = f"http://127.0.0.1:{args.port}"
+            asyncio.run(wait_for_server('127.0.0.1', args.port, server, log_path))
+            sensors = dataset['sensors']
+
+        print(f"Starte Lasttest: {args.concurrency} Clients, {write_ratio * 100:.0f} % Schreibzugriffe, "
+              f"{args.duration:.0f} s")
+        load_test = LoadTest(base_url, sensors, args.concurrency, write_ratio, args.duration)
+        print_report(asyncio.run(load_test.run()))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if log_file is not None:
+            log_file.close()
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import argparse
+import json
+import math
+import os
+import random
+from typing import Dict, Iterable, List, Optional
+
+from sensor_history import (
+    JSON_FILE_PATH, load_sensor_data, parse_timestamp, sorted_history, calculate_fill_level, sensor_kind
+)
+
+# Tägliche Quantil-Sketches pro Sensor und Messgröße
+SKETCH_FILE_PATH = os.path.join('src', 'data', 'sensorSketches.json')
+# Genauigkeitsparameter (Rangfehler etwa 1.7 / k)
+DEFAULT_K = 128
+# Schrumpffaktor der Kapazität pro Ebene
+CAPACITY_FACTOR = 2 / 3
+
+class KLLSketch:
+    """
+    KLL-Sketch für approximative Quantile mit begrenztem Speicher.
+    Sketches lassen sich verlustarm zusammenführen (Sensor -> Asset -> Raum -> Filiale).
+    """
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = k
+        self.compactors = [[]]
+        self.count = 0
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * CAPACITY_FACTOR ** depth)))
+
+    def _size(self) -> int:
+        return sum(len(compactor) for compactor in self.compactors)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _compress(self) -> None:
+        while self._size() > self._max_size():
+            for level, compactor in enumerate(self.compactors):
+                if len(compactor) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    compactor.sort()
+                    # Bei ungerader Anzahl bleibt ein Element auf der Ebene
+                    keep = [compactor.pop()] if len(compactor) % 2 else []
+                    offset = random.randint(0, 1)
+                    self.compactors[level + 1].extend(compactor[offset::2])
+                    self.compactors[level] = keep
+                    break
+
+    def add(self, value: float) -> None:
+        self.compactors[0].append(value)
+        self.count += 1
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def update(self, values: Iterable[float]) -> 'KLLSketch':
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Führt einen weiteren Sketch in diesen ein."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, compactor in enumerate(other.compactors):
+            self.compactors[level].extend(compactor)
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        weighted = sorted(
+            (value, 2 ** level)
+            for level, compactor in enumerate(self.compactors)
+            for value in compactor
+        )
+        if not weighted:
+            return None
+        total = sum(weight for _, weight in weighted)
+        target = q * total
+        cumulative = 0
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return weighted[-1][0]
+
+    def quantiles(self, qs: Iterable[float] = (0.5, 0.95, 0.99)) -> Dict[str, Optional[float]]:
+        return {f"p{int(round(q * 100))}": self.quantile(q) for q in qs}
+
+    def to_dict(self) -> Dict:
+        return {'k': self.k, 'n': self.count, 'c': self.compactors}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'KLLSketch':
+        sketch = cls(state.get('k', DEFAULT_K))
+        sketch.compactors = [list(compactor) for compactor in state.get('c', [[]])] or [[]]
+        sketch.count = state.get('n', 0)
+        return sketch
+
+def daily_sketches(sensor: Dict, k: int = DEFAULT_K) -> Dict[str, Dict[str, Dict]]:
+    """Sketches pro Messgröße und Tag für einen Sensor (inkl. Füllstand in Prozent)."""
+    parameters = sensor.get('parameters') or {}
+    is_fill = sensor_kind(sensor) == 'fill'
+    sketches = {}
+    for entry in sorted_history(sensor):
+        day = parse_timestamp(entry['timestamp']).strftime('%Y-%m-%d')
+        for metric, value in entry.get('data', {}).items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if is_fill and metric == 'distance':
+                level = calculate_fill_level(value, parameters)
+                if level is not None:
+                    sketches.setdefault('fillLevel', {}).setdefault(day, KLLSketch(k)).add(level)
+            sketches.setdefault(metric, {}).setdefault(day, KLLSketch(k)).add(float(value))
+    return {metric: {day: sketch.to_dict() for day, sketch in days.items()}
+            for metric, days in sketches.items()}
+
+def load_sketch_file(file_path: str = SKETCH_FILE_PATH) -> Dict:
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {'storeId': None, 'sensors': {}}
+
+def sketch_outdated(entry: Optional[Dict], sensor: Dict) -> bool:
+    """
+    Prüft, ob die gespeicherten Tage nicht mehr zur History passen (fehlender Eintrag oder
+    verschobene Zeitstempel nach update_timestamps.py). Verglichen werden erster und letzter Tag.
+    """
+    if entry is None:
+        return True
+    days = [parse_timestamp(item['timestamp']).strftime('%Y-%m-%d') for item in sensor.get('history') or []]
+    stored = {day for metric in entry.get('metrics', {}).values() for day in metric}
+    if not days or not stored:
+        return bool(days) != bool(stored)
+    return (min(days), max(days)) != (min(stored), max(stored))
+
+def update_sketch_file(data: Dict, sensors: Optional[List[Dict]] = None, removed_ids: Iterable = (),
+                       file_path: str = SKETCH_FILE_PATH, store_id: Optional[str] = None) -> None:
+    """
+    Berechnet die Tages-Sketches für die angegebenen Sensoren (Standard: alle) neu
+    und entfernt gelöschte Sensoren. Bestehende Einträge anderer Sensoren bleiben erhalten;
+    Sensoren aus data ohne passenden Eintrag (siehe sketch_outdated) werden neu berechnet.
+    """
+    store = load_sketch_file(file_path)
+    if store_id is not None or store.get('storeId') is None:
+        store['storeId'] = store_id or 'store'
+    asset_categories = {asset['id']: asset.get('categoryId') for asset in data.get('assets', [])}
+
+    removed = {str(sensor_id) for sensor_id in removed_ids}
+    for sensor_id in removed:
+        store['sensors'].pop(sensor_id, None)
+    if sensors is None:
+        sensors = data.get('sensors', [])
+    else:
+        selected = {id(sensor) for sensor in sensors}
+        sensors = list(sensors) + [sensor for sensor in data.get('sensors', [])
+                                   if id(sensor) not in selected and str(sensor['id']) not in removed
+                                   and sketch_outdated(store['sensors'].get(str(sensor['id'])), sensor)]
+    for sensor in sensors:
+        store['sensors'][str(sensor['id'])] = {
+            'type': sensor.get('type'),
+            'assetId': sensor.get('assetId'),
+            'roomId': sensor.get('roomId'),
+            'categoryId': asset_categories.get(sensor.get('assetId')),
+            'metrics': daily_sketches(sensor)
+        }
+
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump(store, file)
+
+def merge_sketches(stores: List[Dict], metric: str, group_by: str = 'store',
+                   days: Optional[Iterable[str]] = None) -> Dict[str, KLLSketch]:
+    """
+    Führt die Tages-Sketches einer Messgröße über Sensoren und Filialen zusammen.
+    group_by: 'store', 'room', 'category', 'asset', 'sensor' oder 'fleet'.
+    """
+    wanted_days = set(days) if days is not None else None
+    groups = {}
+    for store in stores:
+        for sensor_id, entry in store.get('sensors', {}).items():
+            if group_by == 'fleet':
+                key = 'fleet'
+            elif group_by == 'store':
+                key = store.get('storeId') or 'store'
+            elif group_by == 'sensor':
+                key = sensor_id
+            else:
+                key = entry.get(f"{group_by}Id")
+                if key is None:
+                    continue
+            for day, state in entry.get('metrics', {}).get(metric, {}).items():
+                if wanted_days is not None and day not in wanted_days:
+                    continue
+                sketch = KLLSketch.from_dict(state)
+                if key in groups:
+                    groups[key].merge(sketch)
+                else:
+                    groups[key] = sketch
+    return groups
+
+def main():
+    parser = argparse.ArgumentParser(description="Flottenweite Quantile aus den Tages-Sketches")
+    parser.add_argument('files', nargs='*', default=[SKETCH_FILE_PATH], help="Sketch-Dateien (eine pro Filiale)")
+    parser.add_argument('--metric', default='temperature', help="Messgröße, z.B. temperature, co2, current, fillLevel")
+    parser.add_argument('--group-by', default='room', choices=['fleet', 'store', 'room', 'category', 'asset', 'sensor'])
+    parser.add_argument('--build', action='store_true',
+                        help="Sketch-Datei vorher komplett aus sensorData.json neu berechnen")
+    args = parser.parse_args()
+
+    if args.build:
+        if os.path.exists(SKETCH_FILE_PATH):
+            os.remove(SKETCH_FILE_PATH)
+        update_sketch_file(load_sensor_data(JSON_FILE_PATH))
+
+    stores = [load_sketch_file(path) for path in args.files]
+    groups = merge_sketches(stores, args.metric, args.group_by)
+    if not groups:
+        print("Keine Sketches gefunden. Bitte zuerst Daten generieren.")
+        return
+
+    print(f"\nQuantile für {args.metric} nach {args.group_by}:")
+    for key, sketch in groups.items():
+        quantiles = sketch.quantiles()
+        print(f"{key}: p50 {quantiles['p50']:.1f}, p95 {quantiles['p95']:.1f}, p99 {quantiles['p99']:.1f} "
+              f"({sketch.count} Messwerte)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sensor_history import (
+    load_sensor_data, iter_metric, sensor_kind, calculate_fill_level
+)
+
+# Sprünge nach oben ab dieser Größe (Prozentpunkte) gelten als Nachfüllung
+REFILL_JUMP = 5.0
+# Mindestanzahl an Intervallen pro Stunde, bevor die Stundenrate genutzt wird
+MIN_SAMPLES_PER_HOUR = 2
+# Maximaler Prognosehorizont in Stunden
+FORECAST_HORIZON_HOURS = 7 * 24
+# Fallback-Schwellwert wie in getFillLevelStatus
+DEFAULT_CRITICAL_THRESHOLD = 20
+
+def collect_consumption(fill_sensors: List[Dict]) -> Dict:
+    """
+    Sammelt die Verbrauchsintervalle aller Füllstandssensoren in flachen Arrays.
+    Jede Position steht für ein Intervall: Sensor-Index, Stunde, Verbrauch in %/h.
+    """
+    sensor_index = array('i')
+    hours = array('b')
+    rates = array('d')
+    last_levels = []
+    last_times = []
+
+    for index, sensor in enumerate(fill_sensors):
+        parameters = sensor.get('parameters') or {}
+        previous_time = None
+        previous_level = None
+
+        for timestamp, distance in iter_metric(sensor, 'distance'):
+            level = calculate_fill_level(distance, parameters)
+            if level is None:
+                continue
+            if previous_time is not None:
+                dt_hours = (timestamp - previous_time).total_seconds() / 3600
+                change = level - previous_level
+                # Nachfüllungen und doppelte Zeitstempel nicht als Verbrauch werten
+                if dt_hours > 0 and change < REFILL_JUMP:
+                    sensor_index.append(index)
+                    hours.append(previous_time.hour)
+                    rates.append(max(0.0, -change) / dt_hours)
+            previous_time = timestamp
+            previous_level = level
+
+        last_levels.append(previous_level)
+        last_times.append(previous_time)
+
+    return {
+        'sensor_index': sensor_index,
+        'hours': hours,
+        'rates': rates,
+        'last_levels': last_levels,
+        'last_times': last_times
+    }
+
+def fit_hourly_rates(samples: Dict, num_sensors: int) -> List[List[Optional[float]]]:
+    """
+    Schätzt die Verbrauchsrate pro Sensor und Tagesstunde in einem Durchlauf
+    über alle Intervalle der Flotte (flache Matrix num_sensors x 24).
+    """
+    sums = array('d', [0.0]) * (num_sensors * 24)
+    counts = array('i', [0]) * (num_sensors * 24)
+
+    for index, hour, rate in zip(samples['sensor_index'], samples['hours'], samples['rates']):
+        cell = index * 24 + hour
+        sums[cell] += rate
+        counts[cell] += 1
+
+    hourly_rates = []
+    for index in range(num_sensors):
+        base = index * 24
+        total = sum(sums[base:base + 24])
+        total_count = sum(counts[base:base + 24])
+        if total_count == 0:
+            hourly_rates.append([None] * 24)
+            continue
+
+        # Stunden mit zu wenig Daten erhalten die mittlere Rate des Sensors
+        mean_rate = total / total_count
+        hourly_rates.append([
+            sums[base + hour] / counts[base + hour]
+            if counts[base + hour] >= MIN_SAMPLES_PER_HOUR else mean_rate
+            for hour in range(24)
+        ])
+
+    return hourly_rates
+
+def predict_hours_until_critical(level: float, critical_threshold: float, rates: List[Optional[float]],
+                                 start: datetime) -> Optional[float]:
+    """Schreitet stundenweise mit den Tagesstunden-Raten vor, bis der kritische Füllstand erreicht ist."""
+    if level <= critical_threshold:
+        return 0.0
+    if rates[0] is None:
+        return None
+
+    current = start
+    elapsed = 0.0
+    while elapsed < FORECAST_HORIZON_HOURS:
+        rate = rates[current.hour]
+        # Anteil der laufenden Stunde bis zur nächsten vollen Stunde
+        step = 1 - (current.minute * 60 + current.second) / 3600
+        consumed = rate * step
+        if level - consumed <= critical_threshold:
+            return elapsed + (level - critical_threshold) / rate
+        level -= consumed
+        elapsed += step
+        current = current.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+    return None
+
+def forecast_restock(data: Dict, now: Optional[datetime] = None) -> List[Dict]:
+    """
+    Erstellt für alle Füllstandssensoren eine Prognose der Zeit bis zum kritischen Füllstand.
+    Das Ergebnis ist nach Dringlichkeit sortiert und kann direkt als Auffüllliste dienen.
+    """
+    fill_sensors = [sensor for sensor in data.get('sensors', []) if sensor_kind(sensor) == 'fill']
+    samples = collect_consumption(fill_sensors)
+    hourly_rates = fit_hourly_rates(samples, len(fill_sensors))
+
+    forecasts = []
+    for index, sensor in enumerate(fill_sensors):
+        level = samples['last_levels'][index]
+        if level is None:
+            continue
+
+        parameters = sensor.get('parameters') or {}
+        critical_threshold = parameters.get('criticalThreshold') or DEFAULT_CRITICAL_THRESHOLD
+        start = now or samples['last_times'][index]
+        rates = hourly_rates[index]
+        hours_until_critical = predict_hours_until_critical(level, critical_threshold, rates, start)
+
+        forecasts.append({
+            'sensorId': sensor['id'],
+            'assetId': sensor.get('assetId'),
+            'roomId': sensor.get('roomId'),
+            'fillLevel': round(level, 1),
+            'criticalThreshold': critical_threshold,
+            'consumptionRate': round(rates[start.hour], 2) if rates[start.hour] is not None else None,
+            'hoursUntilCritical': round(hours_until_critical, 1) if hours_until_critical is not None else None,
+            'criticalAt': (start + timedelta(hours=hours_until_critical)).isoformat()
+                          if hours_until_critical is not None else None
+        })
+
+    # Sensoren ohne Prognose landen am Ende der Liste
+    forecasts.sort(key=lambda f: (f['hoursUntilCritical'] is None, f['hoursUntilCritical'] or 0))
+    return forecasts
+
+def main():
+    data = load_sensor_data()
+    asset_names = {asset['id']: asset['name'] for asset in data.get('assets', [])}
+
+    started = time.perf_counter()
+    forecasts = forecast_restock(data)
+    duration = time.perf_counter() - started
+
+    print("\nAuffüllliste:")
+    for forecast in forecasts:
+        name = asset_names.get(forecast['assetId'], f"Sensor {forecast['sensorId']}")
+        if forecast['hoursUntilCritical'] is None:
+            eta = "nicht berechenbar"
+        else:
+            eta = f"{forecast['hoursUntilCritical']} Stunden"
+        print(f"{name}: {forecast['fillLevel']}% (kritisch bei {forecast['criticalThreshold']}%) - {eta}")
+
+    print(f"\n{len(forecasts)} Füllstandssensoren in {duration * 1000:.0f} ms prognostiziert.")
+
+if __name__ == "__main__":
+    main()
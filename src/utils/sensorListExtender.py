@@ -5,6 +5,10 @@ import os
 import math
 from typing import Dict, List, Optional
 
+from sensor_history import apply_deadband, DEADBAND_HEARTBEAT
+from sensor_wal import SensorWAL
+from quantile_sketch import update_sketch_file
+
 # Pfad zur JSON-Datei
 JSON_FILE_PATH = os.path.join('src', 'data', 'sensorData.json')
 
@@ -167,20 +171,6 @@ def simulate_anomaly(sensor_type: str, use_case: int) -> Dict:
     anomaly_type = random.choice(list(anomaly_dict.keys()))
     return anomaly_dict[anomaly_type]
 
-def load_json(file_path: str) -> Dict:
-    """Lädt JSON-Daten aus einer Datei."""
-    try:
-        with open(file_path, "r") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        print("Datei nicht gefunden. Es wird eine neue Datei erstellt.")
-        return {"sensors": []}
-
-def save_json(data: Dict, file_path: str) -> None:
-    """Speichert JSON-Daten in eine Datei."""
-    with open(file_path, "w") as file:
-        json.dump(data, file, indent=2)
-
 def generate_climate_data(template: Dict, timestamp: datetime, last_values: Optional[Dict] = None,
                         anomaly: Optional[Dict] = None) -> Dict:
     """Generiert realistische Klimadaten basierend auf Template und Tageszeit."""
@@ -412,8 +402,11 @@ def generate_history(sensor_type: str, use_case: int, template: Optional[Dict] =
 
     return history
 
-def add_sensors(sensors: List[Dict], num_sensors: int = 1) -> None:
-    """Fügt eine angegebene Anzahl von Sensoren mit realistischen Daten hinzu."""
+def add_sensors(sensors: List[Dict], num_sensors: int = 1, deadband: bool = False) -> None:
+    """
+    Fügt eine angegebene Anzahl von Sensoren mit realistischen Daten hinzu.
+    Mit deadband=True werden nur Änderungen über dem Schwellwert plus Heartbeat gespeichert.
+    """
     sensor_id = max(sensor["id"] for sensor in sensors) + 1 if sensors else 1
     
     start_date = datetime.now() - timedelta(days=7)  # Die letzten 7 Tage
@@ -446,6 +439,8 @@ def add_sensors(sensors: List[Dict], num_sensors: int = 1) -> None:
                 }
 
         history = generate_history(sensor_type, matched_usecase, template, start_date)
+        if deadband:
+            history = apply_deadband(history)
 
         new_sensor = {
             "id": sensor_id,
@@ -455,14 +450,21 @@ def add_sensors(sensors: List[Dict], num_sensors: int = 1) -> None:
             "matchedUseCase": None,
             "parameters": template
         }
+        if deadband:
+            new_sensor["sampling"] = {
+                "mode": "deadband",
+                "heartbeatMinutes": int(DEADBAND_HEARTBEAT.total_seconds() // 60)
+            }
 
         sensors.append(new_sensor)
         print(f"Sensor mit ID {sensor_id}, Typ {sensor_type} und UseCase {matched_usecase} hinzugefügt.")
         sensor_id += 1
 
 def main():
-    data = load_json(JSON_FILE_PATH)
+    wal = SensorWAL(JSON_FILE_PATH)
+    data = wal.read()
     sensors = data.get("sensors", [])
+    original_sensors = list(sensors)
 
     while True:
         print("\n1. Neue Sensoren hinzufügen")
@@ -473,7 +475,8 @@ def main():
 
         if choice == "1":
             num_sensors = int(input("Anzahl der hinzuzufügenden Sensoren: "))
-            add_sensors(sensors, num_sensors)
+            deadband = input("Nur Änderungen speichern (Deadband)? (j/n): ").strip().lower() == "j"
+            add_sensors(sensors, num_sensors, deadband)
         elif choice == "2":
             print(json.dumps(sensors, indent=2))
         elif choice == "3":
@@ -484,8 +487,21 @@ def main():
         else:
             print("Ungültige Eingabe.")
 
-    data["sensors"] = sensors
-    save_json(data, JSON_FILE_PATH)
+    # Nur Änderungen ins Protokoll schreiben statt die ganze Datei neu zu schreiben
+    kept = {id(sensor) for sensor in sensors}
+    existing = {id(sensor) for sensor in original_sensors}
+    records = [wal.record("delete", "sensors", sensor["id"])
+               for sensor in original_sensors if id(sensor) not in kept]
+    records += [wal.record("upsert", "sensors", sensor["id"], sensor)
+                for sensor in sensors if id(sensor) not in existing]
+    wal.write_batch(records)
+    # server.js spielt das Protokoll beim Lesen ein; verdichtet wird erst ab der Schwellgröße
+    # (und bei jedem Start durch update_timestamps.py)
+    wal.compact_if_needed()
+
+    # Tages-Sketches nur für neue bzw. entfernte Sensoren aktualisieren
+    update_sketch_file(data, [sensor for sensor in sensors if id(sensor) not in existing],
+                       [sensor["id"] for sensor in original_sensors if id(sensor) not in kept])
     print("Daten gespeichert.")
 
 if __name__ == "__main__":
@@ -0,0 +1,181 @@
+import math
+import operator
+from array import array
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+from sensor_history import load_sensor_data, iter_metric, sensor_kind
+
+# Gemeinsames Raster (Klima/Energie messen alle 15 Minuten)
+DEFAULT_STEP = timedelta(minutes=15)
+# Maximale Verschiebung in Rasterschritten für die Kreuzkorrelation
+DEFAULT_MAX_LAG = 8
+# Messgrößen, die pro Sensorart verglichen werden
+CORRELATION_METRICS = {
+    'door': ['open'],
+    'climate': ['temperature', 'humidity', 'co2'],
+    'energy': ['current'],
+    'fill': ['distance']
+}
+
+NAN = float('nan')
+
+def sensor_series(sensor: Dict, metric: str):
+    """Liefert (Zeitpunkt, Wert). Für Türen ist 'open' der Zustand 1.0 (offen) bzw. 0.0."""
+    if metric == 'open':
+        parameters = sensor.get('parameters') or {}
+        limit = parameters.get('targetDistance', 0) + parameters.get('tolerance', 5)
+        for timestamp, distance in iter_metric(sensor, 'distance'):
+            yield timestamp, 1.0 if distance > limit else 0.0
+    else:
+        yield from iter_metric(sensor, metric)
+
+def resample(sensor: Dict, metric: str, start: datetime, steps: int, step: timedelta) -> array:
+    """
+    Bringt eine Messreihe auf das Raster [start, start + steps * step).
+    Türzustände werden vorwärts übernommen, analoge Werte pro Zelle gemittelt;
+    leere Zellen übernehmen den letzten Wert. Vor dem ersten Messwert steht NaN.
+    """
+    step_seconds = step.total_seconds()
+    sums = array('d', [0.0]) * steps
+    counts = array('i', [0]) * steps
+    is_state = metric == 'open'
+    result = array('d', [NAN]) * steps
+    carry = NAN
+
+    for timestamp, value in sensor_series(sensor, metric):
+        index = int((timestamp - start).total_seconds() // step_seconds)
+        if index < 0:
+            # Zustand vor dem Raster als Startwert merken
+            carry = value
+            continue
+        if index >= steps:
+            break
+        if is_state:
+            # Letzter Zustand innerhalb der Zelle gilt
+            sums[index] = value
+            counts[index] = 1
+        else:
+            sums[index] += value
+            counts[index] += 1
+
+    for index in range(steps):
+        if counts[index]:
+            carry = sums[index] / counts[index]
+        result[index] = carry
+    return result
+
+def align(sensors: List[Dict], start: Optional[datetime] = None, end: Optional[datetime] = None,
+          step: timedelta = DEFAULT_STEP) -> Tuple[List[datetime], Dict[Tuple, array]]:
+    """
+    Richtet beliebige Sensoren auf ein gemeinsames Raster aus.
+    Ergebnis: Rasterzeitpunkte und je (sensor_id, Messgröße) ein zusammenhängendes Array.
+    """
+    bounds = [timestamp for sensor in sensors
+              for metric in CORRELATION_METRICS.get(sensor_kind(sensor), [])
+              for timestamp in first_and_last(sensor_series(sensor, metric))]
+    if not bounds:
+        return [], {}
+    start = start or min(bounds)
+    end = end or max(bounds)
+    steps = int((end - start).total_seconds() // step.total_seconds()) + 1
+    grid = [start + step * index for index in range(steps)]
+
+    columns = {}
+    for sensor in sensors:
+        for metric in CORRELATION_METRICS.get(sensor_kind(sensor), []):
+            columns[(sensor['id'], metric)] = resample(sensor, metric, start, steps, step)
+    return grid, columns
+
+def first_and_last(series) -> List[datetime]:
+    first = last = None
+    for timestamp, _ in series:
+        if first is None:
+            first = timestamp
+        last = timestamp
+    return [first, last] if first is not None else []
+
+def standardize(values: array) -> Optional[array]:
+    """Zentriert und normiert eine Reihe; None bei konstanter Reihe."""
+    n = len(values)
+    if n < 2:
+        return None
+    mean = math.fsum(values) / n
+    centered = array('d', (value - mean for value in values))
+    norm = math.sqrt(math.fsum(map(operator.mul, centered, centered)))
+    if norm == 0:
+        return None
+    return array('d', (value / norm for value in centered))
+
+def lagged_correlations(a: array, b: array, max_lag: int = DEFAULT_MAX_LAG) -> Dict[int, float]:
+    """
+    Pearson-Korrelation von a und b für Verschiebungen -max_lag..max_lag.
+    Ein positiver Lag bedeutet: b folgt a um lag Rasterschritte.
+    """
+    # Gemeinsamer gültiger Bereich (nach Vorwärtsfüllung nur noch führende NaNs)
+    first = 0
+    while first < len(a) and (math.isnan(a[first]) or math.isnan(b[first])):
+        first += 1
+    a = a[first:]
+    b = b[first:]
+
+    results = {}
+    for lag in range(-max_lag, max_lag + 1):
+        if lag >= 0:
+            left, right = a[:len(a) - lag], b[lag:]
+        else:
+            left, right = a[-lag:], b[:len(b) + lag]
+        left = standardize(left)
+        right = standardize(right)
+        if left is None or right is None:
+            continue
+        results[lag] = math.fsum(map(operator.mul, left, right))
+    return results
+
+def room_correlations(data: Dict, step: timedelta = DEFAULT_STEP,
+                      max_lag: int = DEFAULT_MAX_LAG) -> List[Dict]:
+    """
+    Berechnet für alle Sensorpaare im selben Raum die stärkste verschobene Korrelation
+    (z.B. Haupteingang offen -> Temperatur im Verkaufsraum). Sortiert nach Stärke.
+    """
+    rooms = {}
+    for sensor in data.get('sensors', []):
+        if sensor.get('roomId') and sensor_kind(sensor):
+            rooms.setdefault(sensor['roomId'], []).append(sensor)
+
+    results = []
+    for room_id, sensors in rooms.items():
+        _, columns = align(sensors, step=step)
+        for (key_a, series_a), (key_b, series_b) in combinations(columns.items(), 2):
+            if key_a[0] == key_b[0]:
+                continue
+            correlations = lagged_correlations(series_a, series_b, max_lag)
+            if not correlations:
+                continue
+            best_lag = max(correlations, key=lambda lag: abs(correlations[lag]))
+            results.append({
+                'roomId': room_id,
+                'a': {'sensorId': key_a[0], 'metric': key_a[1]},
+                'b': {'sensorId': key_b[0], 'metric': key_b[1]},
+                'lag': best_lag,
+                'lagMinutes': int(best_lag * step.total_seconds() // 60),
+                'correlation': round(correlations[best_lag], 3)
+            })
+
+    results.sort(key=lambda result: -abs(result['correlation']))
+    return results
+
+def main():
+    data = load_sensor_data()
+    room_names = {room['id']: room['name'] for room in data.get('rooms', [])}
+
+    print("\nStärkste Zusammenhänge je Raum:")
+    for result in room_correlations(data)[:20]:
+        room = room_names.get(result['roomId'], result['roomId'])
+        print(f"{room}: Sensor {result['a']['sensorId']} {result['a']['metric']} ~ "
+              f"Sensor {result['b']['sensorId']} {result['b']['metric']} "
+              f"r={result['correlation']} (Versatz {result['lagMinutes']} min)")
+
+if __name__ == "__main__":
+    main()
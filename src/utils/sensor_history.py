@@ -0,0 +1,175 @@
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Pfad zur JSON-Datei
+JSON_FILE_PATH = os.path.join('src', 'data', 'sensorData.json')
+
+def load_sensor_data(file_path: str = JSON_FILE_PATH) -> Dict:
+    """
+    Lädt den kompletten Datensatz (Sensoren, Räume, Assets, ...).
+    Noch nicht verdichtete Änderungen aus dem Protokoll (sensor_wal.py) werden eingespielt.
+    """
+    if os.path.exists(file_path + '.wal'):
+        # Import erst hier, sensor_wal baut selbst auf diesem Modul auf
+        from sensor_wal import SensorWAL
+        return SensorWAL(file_path).read()
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        print(f"Datei {file_path} nicht gefunden.")
+        return {"sensors": [], "rooms": [], "assets": [], "categories": [], "favorites": []}
+
+def parse_timestamp(timestamp: str) -> datetime:
+    """
+    Wandelt einen ISO-Zeitstempel in ein naives datetime um.
+    Die Daten mischen Zeitstempel mit und ohne 'Z', daher wird die Zeitzone verworfen.
+    """
+    return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).replace(tzinfo=None)
+
+def sorted_history(sensor: Dict) -> List[Dict]:
+    """Liefert die History eines Sensors aufsteigend nach Zeit sortiert."""
+    history = sensor.get('history') or []
+    return sorted(history, key=lambda entry: parse_timestamp(entry['timestamp']))
+
+def iter_metric(sensor: Dict, key: str) -> Iterator[Tuple[datetime, float]]:
+    """Iteriert (Zeitpunkt, Wert) einer Messgröße über die sortierte History."""
+    for entry in sorted_history(sensor):
+        value = entry.get('data', {}).get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield parse_timestamp(entry['timestamp']), float(value)
+
+def history_rewritten(booked: List[Dict], last_timestamp: str, first_timestamp: Optional[str] = None) -> bool:
+    """
+    Prüft, ob der bereits verarbeitete Teil einer History noch derselbe ist: Der zuletzt
+    verarbeitete Eintrag muss weiterhin dessen Ende sein und der erste Eintrag unverändert.
+    Schlägt fehl, wenn update_timestamps.py die Zeitstempel verschoben hat.
+    """
+    if not booked:
+        return True
+    if parse_timestamp(booked[-1]['timestamp']) != parse_timestamp(last_timestamp):
+        return True
+    return first_timestamp is not None and parse_timestamp(booked[0]['timestamp']) != parse_timestamp(first_timestamp)
+
+def sensor_kind(sensor: Dict) -> Optional[str]:
+    """
+    Bestimmt die Art eines Sensors analog zu createSensorDisplays:
+    'climate', 'energy', 'fill' (Füllstand) oder 'door' (Öffnungen).
+    """
+    sensor_type = sensor.get('type')
+    if sensor_type in ('climate', 'energy'):
+        return sensor_type
+    if sensor_type == 'distance':
+        parameters = sensor.get('parameters') or {}
+        if sensor.get('matchedUseCase') == 1 or 'maxDistance' in parameters:
+            return 'fill'
+        if sensor.get('matchedUseCase') == 3 or 'targetDistance' in parameters:
+            return 'door'
+    return None
+
+def calculate_fill_level(distance: float, parameters: Dict) -> Optional[float]:
+    """Füllstand in Prozent (entspricht calculateFillLevel in sensorCalculations.js)."""
+    min_distance = parameters.get('minDistance')
+    max_distance = parameters.get('maxDistance')
+    if min_distance is None or not max_distance or max_distance == min_distance:
+        return None
+    level = (max_distance - distance) / (max_distance - min_distance) * 100
+    return max(0.0, min(100.0, level))
+
+# Deadband-Schwellwerte pro Messgröße (Report-on-Change)
+DEADBAND_THRESHOLDS = {
+    'temperature': 0.2,
+    'humidity': 1.0,
+    'co2': 25,
+    'voltage': 1.0,
+    'current': 0.1,
+    'distance': 1.0
+}
+# Maximale Funkstille, danach wird unabhängig von Änderungen gesendet
+DEADBAND_HEARTBEAT = timedelta(hours=1)
+
+def apply_deadband(history: List[Dict], thresholds: Optional[Dict] = None,
+                   heartbeat: timedelta = DEADBAND_HEARTBEAT) -> List[Dict]:
+    """
+    Reduziert eine History auf Report-on-Change: Ein Eintrag wird nur behalten, wenn sich
+    eine Messgröße seit dem letzten gesendeten Wert um mindestens den Schwellwert geändert hat,
+    ein Status-Flag wechselt oder der Heartbeat fällig ist. Der letzte Eintrag bleibt immer erhalten.
+    """
+    thresholds = thresholds or DEADBAND_THRESHOLDS
+    if len(history) <= 2:
+        return list(history)
+
+    reported = [history[0]]
+    last_data = history[0]['data']
+    last_time = parse_timestamp(history[0]['timestamp'])
+
+    for entry in history[1:-1]:
+        data = entry['data']
+        timestamp = parse_timestamp(entry['timestamp'])
+        changed = timestamp - last_time >= heartbeat
+        for key, value in data.items():
+            if changed:
+                break
+            previous = last_data.get(key)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or previous is None:
+                changed = value != previous
+            else:
+                changed = abs(value - previous) >= thresholds.get(key, 0)
+
+        if changed:
+            reported.append(entry)
+            last_data = data
+            last_time = timestamp
+
+    reported.append(history[-1])
+    return reported
+
+# Statusstufen wie STATUS_LEVELS in statusCalculations.js
+STATUS_CRITICAL = "Kritisch"
+STATUS_WARNING = "Warnung"
+STATUS_NORMAL = "Normal"
+STATUS_UNKNOWN = "Unbekannt"
+
+def _deviation_status(checks: List[Tuple[float, float]]) -> str:
+    """checks: Liste aus (Abweichung, Toleranz)."""
+    if any(diff > tolerance * 2 for diff, tolerance in checks):
+        return STATUS_CRITICAL
+    if any(diff > tolerance for diff, tolerance in checks):
+        return STATUS_WARNING
+    return STATUS_NORMAL
+
+def calculate_sensor_status(sensor: Dict) -> str:
+    """Status eines Sensors (entspricht calculateSensorStatus in statusCalculations.js)."""
+    data = sensor.get('data')
+    parameters = sensor.get('parameters') or {}
+    kind = sensor_kind(sensor)
+    if not data or kind is None:
+        return STATUS_UNKNOWN
+
+    try:
+        if kind == 'climate':
+            return _deviation_status([
+                (abs(data['temperature'] - (parameters.get('targetTemperature') or 21)), parameters.get('tempTolerance') or 2),
+                (abs(data['humidity'] - (parameters.get('targetHumidity') or 50)), parameters.get('humidityTolerance') or 10),
+                (abs(data['co2'] - (parameters.get('targetCO2') or 800)), parameters.get('co2Tolerance') or 200)
+            ])
+        if kind == 'energy':
+            return _deviation_status([
+                (abs(data['voltage'] - (parameters.get('targetVoltage') or 230)), parameters.get('voltageTolerance') or 10),
+                (abs(data['current'] - (parameters.get('targetCurrent') or 10)), parameters.get('currentTolerance') or 1)
+            ])
+        if kind == 'fill':
+            level = calculate_fill_level(data['distance'], parameters)
+            if level is None:
+                return STATUS_UNKNOWN
+            if level < (parameters.get('criticalThreshold') or 20):
+                return STATUS_CRITICAL
+            if level < (parameters.get('warningThreshold') or 40):
+                return STATUS_WARNING
+            return STATUS_NORMAL
+        is_open = data['distance'] > parameters.get('targetDistance', 0) + parameters.get('tolerance', 5)
+        return STATUS_WARNING if is_open else STATUS_NORMAL
+    except (KeyError, TypeError):
+        return STATUS_UNKNOWN
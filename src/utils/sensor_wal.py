@@ -0,0 +1,217 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from delta_sync import VersionStore
+from sensor_history import JSON_FILE_PATH
+
+# Änderungsprotokoll neben der Datendatei
+WAL_FILE_PATH = JSON_FILE_PATH + '.wal'
+# Ab dieser Protokollgröße lohnt sich eine Verdichtung
+COMPACT_THRESHOLD_BYTES = 5 * 1024 * 1024
+
+ENTITY_TYPES = ("sensors", "rooms", "assets", "categories", "favorites")
+
+try:
+    import fcntl
+
+    def _lock(file) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(file) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+except ImportError:
+    # Windows (start.bat): Sperre auf das erste Byte der Sperrdatei
+    import msvcrt
+
+    def _lock(file) -> None:
+        file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                time.sleep(0.05)
+
+    def _unlock(file) -> None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def wal_lock(wal_path: str = WAL_FILE_PATH) -> Iterator[None]:
+    """Exklusive Sperre für Protokoll und Snapshot (gilt für alle Python-Schreiber)."""
+    with open(wal_path + '.lock', 'a+') as lock_file:
+        _lock(lock_file)
+        try:
+            yield
+        finally:
+            _unlock(lock_file)
+
+class SensorWAL:
+    """
+    Append-only Änderungsprotokoll für sensorData.json.
+    Schreiber hängen nur kleine Änderungsdatensätze an, statt die gesamte Datei neu
+    zu schreiben. Leser führen Snapshot und Protokoll zusammen, die Verdichtung
+    schreibt daraus einen neuen Snapshot und leert das Protokoll.
+    """
+
+    def __init__(self, data_path: str = JSON_FILE_PATH, wal_path: Optional[str] = None,
+                 versions: Optional[VersionStore] = None):
+        self.data_path = data_path
+        self.wal_path = wal_path or data_path + '.wal'
+        # Jeder neue Snapshot erhält eine Version für den Delta-Abgleich (versions/ neben der Datendatei)
+        self.versions = versions or VersionStore(os.path.join(os.path.dirname(data_path), 'versions'), data_path)
+
+    def _write(self, records: List[Dict]) -> None:
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with wal_lock(self.wal_path):
+            with open(self.wal_path, 'a', encoding='utf-8') as file:
+                file.write(lines)
+                file.flush()
+                os.fsync(file.fileno())
+
+    def record(self, op: str, entity_type: str, entity_id, payload=None) -> Dict:
+        """
+        Erzeugt einen Änderungsdatensatz ('upsert' oder 'delete'). Beide lassen sich gefahrlos
+        mehrfach einspielen, falls ein Leser Snapshot und Protokoll während einer Verdichtung liest.
+        """
+        return {
+            "op": op,
+            "entityType": entity_type,
+            "entityId": entity_id,
+            "timestamp": datetime.now().isoformat(),
+            "payload": payload
+        }
+
+    def upsert(self, entity_type: str, entity: Dict) -> None:
+        """Legt eine Entität an oder überschreibt die angegebenen Felder."""
+        self._write([self.record("upsert", entity_type, entity["id"], entity)])
+
+    def delete(self, entity_type: str, entity_id) -> None:
+        self._write([self.record("delete", entity_type, entity_id)])
+
+    def write_batch(self, records: List[Dict]) -> None:
+        """Schreibt mehrere Datensätze (siehe record) in einem Zug."""
+        if records:
+            self._write(records)
+
+    def read_records(self) -> List[Dict]:
+        try:
+            with open(self.wal_path, 'r', encoding='utf-8') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return []
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Unvollständige letzte Zeile (abgebrochener Schreibvorgang) ignorieren
+                continue
+        return records
+
+    def _read_snapshot(self) -> Dict:
+        try:
+            with open(self.data_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {entity_type: [] for entity_type in ENTITY_TYPES}
+
+    def read(self) -> Dict:
+        """Liefert den aktuellen Stand: Snapshot plus alle protokollierten Änderungen."""
+        with wal_lock(self.wal_path):
+            data = self._read_snapshot()
+            records = self.read_records()
+        return apply_records(data, records)
+
+    def _write_snapshot(self, data: Dict, previous: Optional[Dict] = None) -> None:
+        """
+        Ersetzt den Snapshot atomar (Leser sehen nie eine halbe Datei) und leert das Protokoll.
+        previous ist der bisherige Stand für das Versions-Delta (None: Komplettabgleich).
+        Nur unter wal_lock aufrufen.
+        """
+        os.makedirs(os.path.dirname(self.data_path) or '.', exist_ok=True)
+        temp_path = self.data_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=2, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.data_path)
+        self.versions.record(data, previous)
+
+        # Protokoll leeren
+        open(self.wal_path, 'w').close()
+
+    def compact(self) -> int:
+        """Faltet das Protokoll in einen neuen Snapshot und leert es."""
+        with wal_lock(self.wal_path):
+            records = self.read_records()
+            if not records:
+                return 0
+            # apply_records verändert den Snapshot, für das Versions-Delta wird er separat gelesen
+            self._write_snapshot(apply_records(self._read_snapshot(), records), self._read_snapshot())
+        return len(records)
+
+    def rewrite(self, transform: Callable[[Dict], Dict]) -> Dict:
+        """
+        Für Schreiber, die den gesamten Datensatz umschreiben (z.B. update_timestamps.py):
+        Unter der Sperre wird der aktuelle Stand inkl. Protokoll gelesen, umgeschrieben
+        und als neuer Snapshot gespeichert. So gehen keine protokollierten Änderungen
+        verloren und nichts wird später auf den neuen Snapshot nachgespielt.
+        """
+        with wal_lock(self.wal_path):
+            data = transform(apply_records(self._read_snapshot(), self.read_records()))
+            self._write_snapshot(data)
+        return data
+
+    def replace(self, data: Dict) -> None:
+        """Ersetzt den kompletten Datensatz (z.B. neu generierte Daten) und verwirft das Protokoll."""
+        with wal_lock(self.wal_path):
+            self._write_snapshot(data)
+
+    def compact_if_needed(self) -> int:
+        try:
+            size = os.path.getsize(self.wal_path)
+        except FileNotFoundError:
+            return 0
+        return self.compact() if size >= COMPACT_THRESHOLD_BYTES else 0
+
+def apply_records(data: Dict, records: List[Dict]) -> Dict:
+    """Spielt Änderungsdatensätze in der Reihenfolge des Protokolls auf einen Snapshot ein."""
+    indexes = {}
+
+    def index_for(entity_type: str) -> Dict:
+        if entity_type not in indexes:
+            items = data.setdefault(entity_type, [])
+            indexes[entity_type] = {str(item["id"]): item for item in items}
+        return indexes[entity_type]
+
+    for record in records:
+        entity_type = record["entityType"]
+        entity_id = str(record["entityId"])
+        index = index_for(entity_type)
+
+        if record["op"] == "upsert":
+            item = index.get(entity_id)
+            if item is None:
+                item = dict(record["payload"])
+                data[entity_type].append(item)
+                index[entity_id] = item
+            else:
+                item.update(record["payload"])
+        elif record["op"] == "delete":
+            if index.pop(entity_id, None) is not None:
+                data[entity_type] = [item for item in data[entity_type] if str(item["id"]) != entity_id]
+    return data
+
+def main():
+    wal = SensorWAL()
+    pending = len(wal.read_records())
+    compacted = wal.compact()
+    print(f"{compacted} von {pending} Änderungen in {wal.data_path} übernommen.")
+
+if __name__ == "__main__":
+    main()
@@ -9,14 +9,19 @@ app.use(express.json({ limit: '50mb' }));
 app.use(express.urlencoded({ limit: '50mb', extended: true }));
 app.use(cors());
 
-const DATA_FILE = path.join(__dirname, '..', 'data', 'sensorData.json');
-const BACKUP_DIR = path.join(__dirname, '..', 'data', 'backups');
+// Datendatei kann für Tests (z.B. Lasttests) per Umgebungsvariable umgelenkt werden
+const DATA_FILE = process.env.SENSOR_DATA_FILE || path.join(__dirname, '..', 'data', 'sensorData.json');
+const BACKUP_DIR = path.join(path.dirname(DATA_FILE), 'backups');
+// Änderungsprotokoll der Python-Schreiber (sensor_wal.py), wird beim Lesen eingespielt
+const WAL_FILE = `${DATA_FILE}.wal`;
 const MAX_BACKUPS = 5;
 
 // Cache für häufig abgefragte Daten
 let dataCache = null;
 let lastDataRead = 0;
 const CACHE_TIMEOUT = 5000; // 5 Sekunden Cache-Timeout
+// Bytes des Änderungsprotokolls, die im zuletzt gelesenen Stand enthalten sind
+let walOffset = 0;
 
 function getLocalIpAddress() {
   const interfaces = os.networkInterfaces();
@@ -62,6 +67,76 @@ async function manageBackups() {
   }
 }
 
+async function readWalRecords() {
+  let content;
+  try {
+    content = await fs.readFile(WAL_FILE);
+  } catch (error) {
+    if (error.code === 'ENOENT') return { records: [], offset: 0 };
+    throw error;
+  }
+
+  // Nur vollständige Zeilen einspielen, eine halb geschriebene letzte Zeile folgt beim nächsten Lesen
+  const offset = content.lastIndexOf(0x0a) + 1;
+  const records = [];
+  for (const line of content.subarray(0, offset).toString('utf8').split('\n')) {
+    if (!line.trim()) continue;
+    try {
+      records.push(JSON.parse(line));
+    } catch (error) {
+      console.error('Skipping invalid change log record:', error);
+    }
+  }
+  return { records, offset };
+}
+
+// Entspricht apply_records in sensor_wal.py
+function applyWalRecords(data, records) {
+  const indexes = {};
+  const indexFor = (entityType) => {
+    if (!indexes[entityType]) {
+      data[entityType] = data[entityType] || [];
+      indexes[entityType] = new Map(data[entityType].map(item => [String(item.id), item]));
+    }
+    return indexes[entityType];
+  };
+
+  for (const record of records) {
+    const index = indexFor(record.entityType);
+    const entityId = String(record.entityId);
+    if (record.op === 'upsert') {
+      const item = index.get(entityId);
+      if (item) {
+        Object.assign(item, record.payload);
+      } else {
+        const created = { ...record.payload };
+        data[record.entityType].push(created);
+        index.set(entityId, created);
+      }
+    } else if (record.op === 'delete' && index.delete(entityId)) {
+      data[record.entityType] = data[record.entityType].filter(item => String(item.id) !== entityId);
+    }
+  }
+  return data;
+}
+
+async function foldWal() {
+  if (walOffset === 0) return;
+  let content;
+  try {
+    content = await fs.readFile(WAL_FILE);
+  } catch (error) {
+    if (error.code === 'ENOENT') return;
+    throw error;
+  }
+  // Nur den bereits eingespielten Anfang entfernen, seitdem angehängte Datensätze bleiben erhalten.
+  // Ist das Protokoll kürzer, wurde es inzwischen von Python verdichtet und bleibt unverändert.
+  if (content.length >= walOffset) {
+    await fs.writeFile(WAL_FILE, content.subarray(walOffset));
+  }
+  walOffset = 0;
+}
+
 async function readCurrentData(forceRefresh = false) {
   const now = Date.now();
   
@@ -73,6 +148,9 @@ async function readCurrentData(forceRefresh = false) {
   try {
     const data = await fs.readFile(DATA_FILE, 'utf8');
     const parsedData = JSON.parse(data);
+    const { records, offset } = await readWalRecords();
+    applyWalRecords(parsedData, records);
+    walOffset = offset;
     
     // Aktualisiere Cache
     dataCache = {
@@ -108,8 +186,9 @@ async function writeData(data) {
     
     await manageBackups();
     
-    // Schreibe neue Daten
+    // Schreibe neue Daten (enthalten die eingespielten Protokolldatensätze)
     await fs.writeFile(DATA_FILE, JSON.stringify(data, null, 2));
+    await foldWal();
     
     // Aktualisiere Cache
     dataCache = data;
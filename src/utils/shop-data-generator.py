@@ -1,12 +1,18 @@
-import json
 from datetime import datetime, timedelta
 import random
 import os
 import uuid
+import argparse
+
+from sensor_history import apply_deadband, DEADBAND_HEARTBEAT
+from quantile_sketch import update_sketch_file, SKETCH_FILE_PATH
+from sensor_wal import SensorWAL
 
 class ShopDataGenerator:
-    def __init__(self):
+    def __init__(self, deadband=False):
         self.now = datetime.now()
+        # Report-on-Change: nur Änderungen über dem Schwellwert plus Heartbeat speichern
+        self.deadband = deadband
         self.data = {
             "sensors": [],
             "rooms": [],
@@ -323,6 +329,8 @@ class ShopDataGenerator:
                     # Generiere Parameter und History
                     parameters = self.generate_sensor_parameters(sensor_type, asset["name"])
                     history = self.generate_sensor_history(sensor_type, parameters, is_warning)
+                    if self.deadband:
+                        history = apply_deadband(history)
                     
                     # Bestimme Use Case
                     if sensor_type == "climate":
@@ -352,6 +360,12 @@ class ShopDataGenerator:
                         "roomId": asset["roomId"]
                     }
                     
+                    if self.deadband:
+                        sensor["sampling"] = {
+                            "mode": "deadband",
+                            "heartbeatMinutes": int(DEADBAND_HEARTBEAT.total_seconds() // 60)
+                        }
+                    
                     sensors.append(sensor)
         
         self.data["sensors"] = sensors
@@ -397,17 +411,24 @@ class ShopDataGenerator:
 
 def main():
     """Hauptfunktion zum Generieren und Speichern der Daten."""
+    parser = argparse.ArgumentParser(description="Generiert Shop-Daten für das Dashboard")
+    parser.add_argument('--deadband', action='store_true',
+                        help="Nur Änderungen über dem Schwellwert plus Heartbeat speichern")
+    args = parser.parse_args()
+
     # Zeitstempel für konsistente Daten
-    generator = ShopDataGenerator()
+    generator = ShopDataGenerator(deadband=args.deadband)
     shop_data = generator.generate()
     
-    # Stelle Ausgabeverzeichnis sicher
+    # Speichere Daten unter der Protokollsperre; alte Protokolleinträge gehören zum
+    # ersetzten Datensatz und werden verworfen
     output_file = os.path.join('src', 'data', 'sensorData.json')
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    SensorWAL(output_file).replace(shop_data)
     
-    # Speichere Daten
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(shop_data, f, indent=2, ensure_ascii=False)
+    # Tägliche Quantil-Sketches für die Verteilungs-Dashboards
+    if os.path.exists(SKETCH_FILE_PATH):
+        os.remove(SKETCH_FILE_PATH)
+    update_sketch_file(shop_data)
     
     # Ausgabe von Statistiken
     print("\nStatistiken:")
@@ -416,6 +437,7 @@ def main():
     print(f"Assets: {len(shop_data['assets'])}")
     print(f"Sensoren: {len(shop_data['sensors'])}")
     print(f"Favoriten: {len(shop_data['favorites'])}")
+    print(f"Messwerte: {sum(len(sensor['history']) for sensor in shop_data['sensors'])}")
     
     # Detaillierte Sensor-Verteilung
     print("\nSensor-Verteilung:")